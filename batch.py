@@ -0,0 +1,207 @@
+from .network import SetSharedRequestor
+from .storage import TitlesQueue
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Event, Lock, Thread
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator
+
+import heapq
+
+#==========================================================================================#
+# >>>>> СТАТИСТИКА <<<<< #
+#==========================================================================================#
+
+@dataclass
+class BatchStatistics:
+	"""Сводная статистика пакетной обработки тайтлов."""
+
+	titles: int = 0
+	chapters: int = 0
+	elapsed: float = 0.0
+	errors: dict[str, str] = field(default_factory = dict)
+
+	@property
+	def chapters_rate(self) -> float:
+		"""Количество обработанных глав в секунду."""
+
+		return self.chapters / self.elapsed if self.elapsed else 0.0
+
+	@property
+	def titles_rate(self) -> float:
+		"""Количество обработанных тайтлов в минуту."""
+
+		return self.titles * 60 / self.elapsed if self.elapsed else 0.0
+
+#==========================================================================================#
+# >>>>> ПАКЕТНАЯ ОБРАБОТКА <<<<< #
+#==========================================================================================#
+
+class BatchRunner:
+	"""
+	Параллельно обрабатывает несколько тайтлов.
+
+	Тайтлы из окна предпросмотра запускаются от больших к меньшим, поэтому короткие тайтлы заполняют потоки, освобождающиеся рядом с длинными. Частота запросов ограничивается общим для процесса контроллером модуля `network`.
+	"""
+
+	#==========================================================================================#
+	# >>>>> ПРИВАТНЫЕ МЕТОДЫ <<<<< #
+	#==========================================================================================#
+
+	@contextmanager
+	def __ShareRequestor(self) -> Iterator[None]:
+		"""Регистрирует общий оператор запросов на время обработки, если тот передан."""
+
+		if not self.__Requestor:
+			yield
+			return
+
+		Previous = SetSharedRequestor(self.__Requestor)
+
+		try: yield
+		finally: SetSharedRequestor(Previous)
+
+	#==========================================================================================#
+	# >>>>> ПУБЛИЧНЫЕ МЕТОДЫ <<<<< #
+	#==========================================================================================#
+
+	def __init__(self, process: Callable[[str], int | None], workers: int, size: Callable[[str], int] | None = None, window: int | None = None, requestor: Any = None):
+		"""
+		Параллельно обрабатывает несколько тайтлов.
+
+		:param process: Функция полной обработки тайтла (парсинг, дополнение глав и сохранение), принимающая алиас и возвращающая количество глав.
+		:type process: Callable[[str], int | None]
+		:param workers: Количество одновременно обрабатываемых тайтлов.
+		:type workers: int
+		:param size: Функция оценки размера тайтла по алиасу, например `SourceOperator.title_size()`. Вызывается последовательно при планировании, поэтому не должна выполнять запросов к источнику. По умолчанию тайтлы обрабатываются в порядке поступления.
+		:type size: Callable[[str], int] | None
+		:param window: Количество алиасов, упорядочиваемых по размеру перед запуском. По умолчанию вчетверо больше количества потоков.
+		:type window: int | None
+		:param requestor: Общий оператор запросов с постоянными соединениями, который парсеры используют для собственных запросов на время обработки. Создаётся и закрывается вызывающим кодом. По умолчанию каждый парсер использует оператор Melon.
+		:type requestor: WebRequestor | None
+		"""
+
+		self.__Process = process
+		self.__Workers = max(int(workers or 1), 1)
+		self.__Size = size
+		self.__Window = max(int(window or 0), self.__Workers * 4)
+		self.__Requestor = requestor
+
+	def run(self, slugs: Iterable[str]) -> BatchStatistics:
+		"""
+		Обрабатывает тайтлы. Алиасы могут поступать из генератора, например `SourceOperator.collect_stream()`, и запускаются по мере получения.
+
+		Ошибка обработки тайтла не прерывает пакет и записывается в статистику.
+
+		:param slugs: Последовательность алиасов.
+		:type slugs: Iterable[str]
+		:return: Сводная статистика.
+		:rtype: BatchStatistics
+		"""
+
+		Statistics = BatchStatistics()
+		Start = perf_counter()
+		Slugs = iter(slugs)
+		IsExhausted = False
+		Pending: list[tuple[int, int, str]] = list()
+		Running: dict[Future, str] = dict()
+		Order = 0
+
+		with self.__ShareRequestor(), ThreadPoolExecutor(self.__Workers, "ranobehub-batch") as Executor:
+
+			while True:
+
+				while not IsExhausted and len(Pending) < self.__Window:
+					Slug = next(Slugs, None)
+
+					if Slug is None:
+						IsExhausted = True
+						break
+
+					Size = self.__Size(Slug) if self.__Size else 0
+					heapq.heappush(Pending, (-Size, Order, Slug))
+					Order += 1
+
+				while Pending and len(Running) < self.__Workers:
+					Slug = heapq.heappop(Pending)[2]
+					Running[Executor.submit(self.__Process, Slug)] = Slug
+
+				if not Running: break
+				Done = wait(Running, return_when = FIRST_COMPLETED)[0]
+
+				for CurrentFuture in Done:
+					Slug = Running.pop(CurrentFuture)
+
+					try:
+						Statistics.chapters += CurrentFuture.result() or 0
+						Statistics.titles += 1
+
+					except Exception as ExceptionData: Statistics.errors[Slug] = str(ExceptionData)
+
+		Statistics.elapsed = perf_counter() - Start
+
+		return Statistics
+
+	def run_queue(self, queue: TitlesQueue, owner: str, timeout: float = 600.0) -> BatchStatistics:
+		"""
+		Арендует и обрабатывает тайтлы из общей очереди, пока в ней есть доступные записи. Несколько узлов могут обрабатывать одну очередь одновременно.
+
+		Аренды обрабатываемых тайтлов продлеваются фоновым потоком, поэтому длительность аренды ограничивает только время обнаружения остановившегося узла.
+
+		:param queue: Очередь тайтлов.
+		:type queue: TitlesQueue
+		:param owner: Уникальный идентификатор узла.
+		:type owner: str
+		:param timeout: Длительность аренды (в секундах).
+		:type timeout: float
+		:return: Сводная статистика узла.
+		:rtype: BatchStatistics
+		"""
+
+		Statistics = BatchStatistics()
+		StatisticsLock = Lock()
+		Leases: set[str] = set()
+		IsFinished = Event()
+		Start = perf_counter()
+
+		def Heartbeat():
+			while not IsFinished.wait(timeout / 3):
+				for Slug in tuple(Leases): queue.extend(Slug, owner, timeout)
+
+		def Worker():
+			while True:
+				Lease = queue.lease(owner, timeout)
+				if not Lease: return
+				Leases.add(Lease.slug)
+
+				try: Chapters = self.__Process(Lease.slug) or 0
+
+				except Exception as ExceptionData:
+					queue.release(Lease.slug, owner)
+					with StatisticsLock: Statistics.errors[Lease.slug] = str(ExceptionData)
+
+				else:
+					queue.ack(Lease.slug, owner)
+
+					with StatisticsLock:
+						Statistics.chapters += Chapters
+						Statistics.titles += 1
+
+				finally: Leases.discard(Lease.slug)
+
+		HeartbeatThread = Thread(target = Heartbeat, name = "ranobehub-lease", daemon = True)
+		HeartbeatThread.start()
+
+		try:
+			with self.__ShareRequestor(), ThreadPoolExecutor(self.__Workers, "ranobehub-batch") as Executor:
+				for CurrentFuture in [Executor.submit(Worker) for _ in range(self.__Workers)]: CurrentFuture.result()
+
+		finally:
+			IsFinished.set()
+			HeartbeatThread.join()
+
+		Statistics.elapsed = perf_counter() - Start
+
+		return Statistics
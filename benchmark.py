@@ -0,0 +1,511 @@
+"""
+Офлайн-замеры производительности парсера.
+
+Запуск из корня Melon: `python -m Parsers.ranobehub.benchmark [--output REPORT] [--compare BASELINE]`.
+
+Все запросы обслуживаются заглушкой оператора запросов по синтетическим данным, повторяющим структуру ответов ranobehub.org. Замеры компонентов, коллекционирования и методов `Parser.parse()`, `Parser.amend()` и `Parser.postprocessor()` выполняются автономно. Каждый проход замера методов парсера использует новый объект парсера и тайтла. Дополнение замеряется на первых главах ветви, а постобработка – на ветви, главы которой заполнены без загрузки страниц.
+"""
+
+from Source.Core.Base.Formats.Ranobe.Elements import Paragraph
+
+from .extractor import CreateParsingPool, ExtractChapter, FindContainer, ParseChapterPage
+from .network import ChaptersPrefetcher, RateController
+from .storage import CatalogIndex
+from .metadata import ExtractMetadata
+from .cache import ResponsesCache
+from .main import SourceOperator
+from .ranobe import Parser
+
+from dataclasses import asdict, dataclass, field
+from time import perf_counter, process_time, time
+from types import SimpleNamespace
+from typing import Any, Callable, Iterable
+from urllib.parse import parse_qs, urlparse
+
+import tracemalloc
+import argparse
+import tempfile
+import json
+import os
+import sys
+import re
+
+#==========================================================================================#
+# >>>>> СИНТЕТИЧЕСКИЕ ДАННЫЕ <<<<< #
+#==========================================================================================#
+
+class Fixtures:
+	"""Генератор синтетических ответов источника."""
+
+	def __init__(self, title_id: int = 1000, volumes: int = 50, chapters_per_volume: int = 100, catalog_pages: int = 20):
+		"""
+		Генератор синтетических ответов источника.
+
+		:param title_id: ID тайтла.
+		:type title_id: int
+		:param volumes: Количество томов.
+		:type volumes: int
+		:param chapters_per_volume: Количество глав в томе.
+		:type chapters_per_volume: int
+		:param catalog_pages: Количество страниц каталога и ленты обновлений.
+		:type catalog_pages: int
+		"""
+
+		self.title_id = title_id
+		self.slug = f"{title_id}-benchmark-title"
+		self.volumes = volumes
+		self.chapters_per_volume = chapters_per_volume
+		self.catalog_pages = catalog_pages
+
+	def chapter_page(self, chapter_id: int) -> str:
+		"""Страница главы с заметками, изображениями, цитатами и элементами интерфейса."""
+
+		Paragraphs = list()
+
+		for Index in range(60):
+			Note = f"<sup><a href=\"#note-{Index}\">{Index + 1}</a></sup>" if Index % 3 == 0 else ""
+			Paragraphs.append(f"<p style=\"text-align: justify\">Абзац {Index} главы <b>{chapter_id}</b> с текстом{Note} и <i>оформлением</i>.<br></p>")
+			if Index % 20 == 10: Paragraphs.append(f"<img data-media-id=\"{chapter_id * 10 + Index}\" src=\"/placeholder.jpg\">")
+			if Index % 25 == 5: Paragraphs.append("<blockquote><p>Цитата<a href=\"#note-0\">*</a></p><p>Вторая строка</p></blockquote>")
+			if Index % 30 == 0: Paragraphs.append(f"<h3>Часть {Index // 30 + 1}</h3>")
+
+		Notes = "".join(f"<li id=\"note-{Index}\"><a href=\"#ref-{Index}\">^</a> Пояснение {Index}.</li>" for Index in range(0, 60, 3))
+		Interface = "<div class=\"ui buttons\"><a href=\"/prev\">Назад</a><a href=\"/next\">Вперёд</a></div>"
+		Container = f"<div data-container=\"{chapter_id}\">{Interface}{''.join(Paragraphs)}<ol>{Notes}</ol>{Interface}</div>"
+		Navigation = "".join(f"<a href=\"/ranobe/{self.slug}/1/{Index}\">Глава {Index}</a>" for Index in range(300))
+
+		return f"<html><head><title>Глава</title><script>var data = {{}};</script></head><body><nav>{Navigation}</nav>{Container}<footer>{Navigation}</footer></body></html>"
+
+	def contents(self) -> dict:
+		"""Оглавление тайтла. Первая глава каждого тома, начиная со второго, перенаправляет на последнюю главу предыдущего."""
+
+		Volumes = list()
+		ChapterID = self.title_id * 100000
+
+		for Volume in range(1, self.volumes + 1):
+			Chapters = list()
+
+			for Number in range(1, self.chapters_per_volume + 1):
+				ChapterID += 1
+				Slug = f"{self.slug}/{Volume}/{Number}"
+				if Number == 1 and Volume > 1: Slug = f"{self.slug}/{Volume - 1}/{self.chapters_per_volume}"
+				Chapters.append({"id": ChapterID, "name": f"Глава {Number}", "url": f"https://ranobehub.org/ranobe/{Slug}"})
+
+			Volumes.append({"num": Volume, "chapters": Chapters})
+
+		return {"volumes": Volumes}
+
+	def feed_page(self, page: int, now: int) -> dict:
+		"""Страница ленты обновлений. Каждая страница охватывает один час."""
+
+		Notes = list()
+
+		for Index in range(40):
+			Timestamp = now - (page - 1) * 3600 - Index * 90
+			# Каждый пятый тайтл повторяется, как это происходит в ленте источника.
+			TitleID = 2000 + (page * 40 + Index) - (Index % 5 == 4)
+			Updates = [{"id": TitleID * 10 + Number, "created_at": Timestamp - Number, "url": f"https://ranobehub.org/ranobe/{TitleID}-title/1/{Number}"} for Number in range(3)]
+			Notes.append({"items": [{"ranobe": {"id": TitleID, "url": f"https://ranobehub.org/ranobe/{TitleID}-title"}, "updates": Updates}]})
+
+		return {"resource": Notes if page <= self.catalog_pages else []}
+
+	def search_page(self, page: int) -> dict:
+		"""Страница каталога с данными пагинации."""
+
+		Notes = [{"id": 3000 + page * 40 + Index, "url": f"https://ranobehub.org/ranobe/{3000 + page * 40 + Index}-title"} for Index in range(40)]
+
+		return {"resource": Notes if page <= self.catalog_pages else [], "pagination": {"last_page": self.catalog_pages}}
+
+	def title(self) -> dict:
+		"""Данные тайтла."""
+
+		Description = "".join(f"<p>Абзац описания <b>{Index}</b> &amp; продолжение.</p>" for Index in range(10))
+		Tags = [{"title": f"Тег {Index}"} for Index in range(30)] + [{"title": "18+"}]
+
+		return {"data": {
+			"names": {"rus": "Тайтл", "eng": "Title"},
+			"posters": {"color": "#000", "big": "https://ranobehub.org/img/big.jpg", "medium": "https://ranobehub.org/img/medium.jpg"},
+			"authors": [{"name_eng": "Author"}],
+			"year": 2020,
+			"description": Description,
+			"html": "<div><i class=\"japan flag\"></i><a class=\"ui header tiny grey\">Name A / Name B</a></div>",
+			"status": {"title": "В процессе"},
+			"tags": {"genres": [{"title": "Фэнтези"}], "events": Tags}
+		}}
+
+#==========================================================================================#
+# >>>>> ЗАГЛУШКИ MELON <<<<< #
+#==========================================================================================#
+
+@dataclass
+class StubResponse:
+	"""Ответ заглушки оператора запросов."""
+
+	status_code: int
+	text: str
+	headers: dict = field(default_factory = dict)
+
+	@property
+	def content(self) -> bytes:
+		return self.text.encode()
+
+	@property
+	def ok(self) -> bool:
+		return self.status_code == 200
+
+	@property
+	def json(self) -> Any:
+		return json.loads(self.text)
+
+@dataclass
+class StubConfig:
+	"""Заглушка конфигурации оператора запросов."""
+
+	good_codes: tuple[int | None, ...] = (200,)
+
+	def set_good_codes(self, good_codes: Iterable[int | None]):
+		self.good_codes = tuple(good_codes)
+
+class StubRequestor:
+	"""Заглушка оператора запросов, обслуживающая синтетические данные."""
+
+	def __init__(self, fixtures: Fixtures, now: int | None = None):
+		"""
+		Заглушка оператора запросов, обслуживающая синтетические данные.
+
+		:param fixtures: Генератор синтетических данных.
+		:type fixtures: Fixtures
+		:param now: Время ленты обновлений в формате UNIX. По умолчанию текущее.
+		:type now: int | None
+		"""
+
+		self.fixtures = fixtures
+		self.now = now or int(time())
+		self.config = StubConfig()
+		self.requests = 0
+		self.bytes = 0
+		self.__Pages: dict[int, str] = dict()
+
+	def get(self, url: str, params: dict | None = None, headers: dict | None = None, cookies: dict | None = None) -> StubResponse:
+		"""Обрабатывает запрос GET."""
+
+		self.requests += 1
+		Address = urlparse(url)
+		Page = int(parse_qs(Address.query).get("page", ["1"])[0])
+		ChapterMatch = re.fullmatch(r"/ranobe/[^/]+/\d+/\d+", Address.path)
+
+		if Address.path == "/api/search": Text = json.dumps(self.fixtures.search_page(Page))
+		elif Address.path == "/api/feed": Text = json.dumps(self.fixtures.feed_page(Page, self.now))
+		elif Address.path.endswith("/contents"): Text = json.dumps(self.fixtures.contents())
+		elif Address.path.startswith("/api/ranobe/"): Text = json.dumps(self.fixtures.title())
+
+		elif ChapterMatch:
+			# Контейнер главы содержит ID из пути, подставляемый по номеру тома и главы.
+			Volume, Number = (int(Part) for Part in Address.path.split("/")[-2:])
+			ChapterID = self.fixtures.title_id * 100000 + (Volume - 1) * self.fixtures.chapters_per_volume + Number
+			if ChapterID not in self.__Pages: self.__Pages[ChapterID] = self.fixtures.chapter_page(ChapterID)
+			Text = self.__Pages[ChapterID]
+
+		else: return StubResponse(404, "")
+
+		self.bytes += len(Text.encode())
+
+		return StubResponse(200, Text)
+
+class StubPortals:
+	"""Заглушка порталов вывода."""
+
+	def __getattr__(self, name: str) -> Callable:
+		return lambda *args, **kwargs: None
+
+	def request_error(self, response: StubResponse, text: str):
+		raise RuntimeError(f"{text} Status: {response.status_code}.")
+
+def CreateStubSettings(**custom) -> SimpleNamespace:
+	"""Создаёт настройки парсера без задержек между запросами."""
+
+	return SimpleNamespace(common = SimpleNamespace(delay = 0, pretty = True), custom = {"max_rate": 1_000_000.0, **custom})
+
+class StubTitle:
+	"""Заглушка тайтла, сохраняющая только данные, используемые парсером."""
+
+	def __init__(self, slug: str):
+		self.slug = slug
+		self.id = None
+		self.branches = list()
+
+	def __getattr__(self, name: str) -> Callable:
+		return lambda *args, **kwargs: None
+
+	def add_branch(self, branch: Any):
+		self.branches.append(branch)
+
+	def set_id(self, id: int):
+		self.id = id
+
+def CreateParser(requestor: StubRequestor, directory: str, **custom) -> Parser:
+	"""Создаёт парсер тайтла из синтетических данных, минуя инициализацию Melon."""
+
+	CurrentParser = Parser.__new__(Parser)
+	CurrentParser._SystemObjects = None
+	CurrentParser._Requestor = requestor
+	CurrentParser._Settings = CreateStubSettings(**custom)
+	CurrentParser._Manifest = SimpleNamespace(site = "ranobehub.org")
+	CurrentParser._Portals = StubPortals()
+	CurrentParser._Temper = SimpleNamespace(parser_temp = directory)
+	CurrentParser._Title = StubTitle(requestor.fixtures.slug)
+	CurrentParser._PostInitMethod()
+
+	return CurrentParser
+
+def CreateSourceOperator(requestor: StubRequestor, directory: str, **custom) -> SourceOperator:
+	"""Создаёт оператор источника, минуя инициализацию Melon."""
+
+	Operator = SourceOperator.__new__(SourceOperator)
+	Operator._Requestor = requestor
+	Operator._Settings = CreateStubSettings(**custom)
+	Operator._Manifest = SimpleNamespace(site = "ranobehub.org")
+	Operator._Portals = StubPortals()
+	Operator._Temper = SimpleNamespace(parser_temp = directory)
+
+	return Operator
+
+#==========================================================================================#
+# >>>>> ЗАМЕРЫ <<<<< #
+#==========================================================================================#
+
+@dataclass
+class BenchmarkResult:
+	"""Результат замера."""
+
+	name: str
+	items: int
+	wall_time: float
+	cpu_time: float
+	peak_memory: int
+	requests: int = 0
+
+	@property
+	def throughput(self) -> float:
+		return self.items / self.wall_time if self.wall_time else 0.0
+
+def Measure(name: str, function: Callable[..., int], requestor: StubRequestor | None = None, setup: Callable[[], Any] | None = None) -> BenchmarkResult:
+	"""
+	Замеряет время, процессорное время и пиковое потребление памяти функции.
+
+	Трассировка памяти сильно замедляет выполнение, поэтому время и память замеряются в двух отдельных запусках. Функции с состоянием должны получать новое состояние от функции подготовки в каждом запуске.
+
+	:param name: Название замера.
+	:type name: str
+	:param function: Функция, возвращающая количество обработанных объектов. При наличии функции подготовки принимает её результат.
+	:type function: Callable[..., int]
+	:param requestor: Заглушка оператора запросов для подсчёта запросов.
+	:type requestor: StubRequestor | None
+	:param setup: Функция подготовки состояния, выполняемая перед каждым запуском вне замера.
+	:type setup: Callable[[], Any] | None
+	:return: Результат замера.
+	:rtype: BenchmarkResult
+	"""
+
+	Arguments = (setup(),) if setup else tuple()
+	RequestsBefore = requestor.requests if requestor else 0
+	WallStart, CPUStart = perf_counter(), process_time()
+	Items = function(*Arguments)
+	WallTime, CPUTime = perf_counter() - WallStart, process_time() - CPUStart
+	Requests = requestor.requests - RequestsBefore if requestor else 0
+
+	Arguments = (setup(),) if setup else tuple()
+	tracemalloc.start()
+	function(*Arguments)
+	PeakMemory = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+
+	return BenchmarkResult(name, Items, WallTime, CPUTime, PeakMemory, Requests)
+
+def BenchmarkComponents(fixtures: Fixtures, directory: str) -> list[BenchmarkResult]:
+	"""Замеряет производительность компонентов парсера."""
+
+	Results = list()
+	Requestor = StubRequestor(fixtures)
+	ChapterIDs = [fixtures.title_id * 100000 + Index for Index in range(1, 201)]
+	Pages = {ChapterID: fixtures.chapter_page(ChapterID) for ChapterID in ChapterIDs}
+
+	def Extract() -> int:
+		for ChapterID, Page in Pages.items(): ExtractChapter(*FindContainer(Page, ChapterID))
+		return len(Pages)
+
+	def ExtractInPool(pool: Any) -> int:
+		for _ in pool.map(ParseChapterPage, Pages.values(), ((ChapterID,) for ChapterID in Pages.keys()), chunksize = 8): pass
+		return len(Pages)
+
+	def Metadata() -> int:
+		Data = fixtures.title()["data"]
+		for _ in range(2000): ExtractMetadata(Data)
+		return 2000
+
+	def Prefetch() -> int:
+		Chapters = [SimpleNamespace(id = ChapterID, slug = f"{fixtures.slug}/1/{Index + 1}", paragraphs = None) for Index, ChapterID in enumerate(ChapterIDs)]
+		Branch = SimpleNamespace(id = fixtures.title_id, chapters = Chapters)
+		Controller = RateController(1_000_000.0, 1_000_000.0)
+		Prefetcher = ChaptersPrefetcher(lambda Chapter: Controller.request(Requestor.get, f"https://ranobehub.org/ranobe/{Chapter.slug}"), 8)
+		for Chapter in Chapters: Prefetcher.get(Branch, Chapter)
+		Prefetcher.close()
+		return len(Chapters)
+
+	def CachePrepare() -> str:
+		Descriptor, Path = tempfile.mkstemp(".sqlite", dir = directory)
+		os.close(Descriptor)
+		return Path
+
+	def Cache(path: str) -> int:
+		CacheObject = ResponsesCache(path, 3600, 512 * 1024 ** 2)
+		for _ in range(2):
+			for Chapter in range(1, 201): CacheObject.get(f"https://ranobehub.org/ranobe/{fixtures.slug}/1/{Chapter}", lambda Headers: Requestor.get(f"https://ranobehub.org/ranobe/{fixtures.slug}/1/{Chapter}"))
+		CacheObject.close()
+		return 400
+
+	def Index() -> int:
+		IndexObject = CatalogIndex(directory)
+		for TitleID in range(10000): IndexObject.update(f"{TitleID}-title", TitleID, 1_700_000_000 - TitleID)
+		IndexObject.commit()
+		IndexObject.changed_since(1_700_000_000 - 5000)
+		IndexObject.close()
+		return 10000
+
+	# Пул процессов создаётся и завершается вне замера, чтобы учитывалось только время разбора.
+	Pool = CreateParsingPool(os.cpu_count() or 1)
+	Results.append(Measure("extractor.chapter", Extract))
+	Results.append(Measure("extractor.pool", ExtractInPool, setup = lambda: Pool))
+	Pool.shutdown()
+	Results.append(Measure("metadata.title", Metadata))
+	Results.append(Measure("prefetcher.chapter", Prefetch, Requestor))
+	Results.append(Measure("cache.request", Cache, Requestor, CachePrepare))
+	Results.append(Measure("catalog_index.title", Index))
+
+	return Results
+
+def BenchmarkCollect(fixtures: Fixtures, directory: str) -> list[BenchmarkResult]:
+	"""Замеряет коллекционирование каталога и ленты обновлений."""
+
+	Requestor = StubRequestor(fixtures)
+	Operator = CreateSourceOperator(Requestor, directory)
+	ParallelOperator = CreateSourceOperator(Requestor, directory, collect_workers = 8)
+
+	return [
+		Measure("collect.catalog", lambda: len(Operator.collect()), Requestor),
+		Measure("collect.catalog_parallel", lambda: len(ParallelOperator.collect()), Requestor),
+		Measure("collect.updates", lambda: len(Operator.collect(period = fixtures.catalog_pages // 2)), Requestor)
+	]
+
+def BenchmarkParser(fixtures: Fixtures, directory: str, sample: int = 200) -> list[BenchmarkResult]:
+	"""
+	Замеряет методы парсера на синтетическом тайтле, создавая новый парсер для каждого прохода.
+
+	:param fixtures: Генератор синтетических данных.
+	:type fixtures: Fixtures
+	:param directory: Временный каталог парсера.
+	:type directory: str
+	:param sample: Количество первых глав ветви, дополняемых при замере `Parser.amend()`.
+	:type sample: int
+	:return: Результаты замеров.
+	:rtype: list[BenchmarkResult]
+	"""
+
+	Requestor = StubRequestor(fixtures)
+
+	def Parsed() -> Parser:
+		CurrentParser = CreateParser(Requestor, directory)
+		CurrentParser.parse()
+		return CurrentParser
+
+	def Filled() -> Parser:
+		CurrentParser = Parsed()
+		Slugs = set()
+
+		# Главы заполняются как после дополнения: контент общей страницы получает только первая глава с её алиасом.
+		for Chapter in CurrentParser._Title.branches[0].chapters:
+			if Chapter.slug in Slugs: continue
+			Slugs.add(Chapter.slug)
+			ParagraphObject = Paragraph(None)
+			ParagraphObject.set_text(f"Глава {Chapter.id}.")
+			Chapter.add_element(ParagraphObject)
+
+		return CurrentParser
+
+	def Parse(parser: Parser) -> int:
+		parser.parse()
+		return 1
+
+	def Amend(parser: Parser) -> int:
+		Branch = parser._Title.branches[0]
+		Chapters = tuple(Branch.chapters)[:sample]
+		for Chapter in Chapters: parser.amend(Branch, Chapter)
+		return len(Chapters)
+
+	def Postprocess(parser: Parser) -> int:
+		parser.postprocessor()
+		return len(parser._Title.branches[0].chapters)
+
+	return [
+		Measure("parser.parse", Parse, Requestor, lambda: CreateParser(Requestor, directory)),
+		Measure("parser.amend", Amend, Requestor, Parsed),
+		Measure("parser.postprocessor", Postprocess, setup = Filled)
+	]
+
+#==========================================================================================#
+# >>>>> ОТЧЁТ <<<<< #
+#==========================================================================================#
+
+def Compare(results: list[BenchmarkResult], baseline: dict, tolerance: float) -> list[str]:
+	"""
+	Сравнивает результаты с эталонным отчётом.
+
+	:param results: Результаты замеров.
+	:type results: list[BenchmarkResult]
+	:param baseline: Эталонный отчёт.
+	:type baseline: dict
+	:param tolerance: Допустимое относительное ухудшение.
+	:type tolerance: float
+	:return: Описания регрессий.
+	:rtype: list[str]
+	"""
+
+	Regressions = list()
+	Baseline = {Result["name"]: Result for Result in baseline["results"]}
+
+	for Result in results:
+		Previous = Baseline.get(Result.name)
+		if not Previous or not Previous["throughput"]: continue
+		Ratio = Result.throughput / Previous["throughput"]
+		if Ratio < 1 - tolerance: Regressions.append(f"{Result.name}: throughput {Ratio:.0%} of baseline.")
+		MemoryRatio = Result.peak_memory / Previous["peak_memory"] if Previous["peak_memory"] else 1
+		if MemoryRatio > 1 + tolerance: Regressions.append(f"{Result.name}: peak memory {MemoryRatio:.0%} of baseline.")
+
+	return Regressions
+
+def main():
+	Arguments = argparse.ArgumentParser(description = "Offline ranobehub parser benchmarks.")
+	Arguments.add_argument("--output", help = "Path to write the JSON report.")
+	Arguments.add_argument("--compare", help = "Path to a baseline JSON report.")
+	Arguments.add_argument("--tolerance", type = float, default = 0.15, help = "Allowed relative regression.")
+	Arguments = Arguments.parse_args()
+
+	CurrentFixtures = Fixtures()
+
+	with tempfile.TemporaryDirectory() as Directory:
+		Results = BenchmarkComponents(CurrentFixtures, Directory) + BenchmarkCollect(CurrentFixtures, Directory) + BenchmarkParser(CurrentFixtures, Directory)
+
+	Report = {"results": [dict(asdict(Result), throughput = Result.throughput) for Result in Results]}
+
+	for Result in Results:
+		print(f"{Result.name:<28} {Result.throughput:>12.1f} items/s {Result.cpu_time:>8.3f} s CPU {Result.peak_memory / 1024 ** 2:>8.2f} MB peak {Result.requests:>6} requests")
+
+	if Arguments.output:
+		with open(Arguments.output, "w", encoding = "utf-8") as FileWriter: json.dump(Report, FileWriter, indent = 4)
+
+	if Arguments.compare:
+		with open(Arguments.compare, encoding = "utf-8") as FileReader: Regressions = Compare(Results, json.load(FileReader), Arguments.tolerance)
+		for Regression in Regressions: print(Regression)
+		if Regressions: sys.exit(1)
+
+if __name__ == "__main__": main()
@@ -0,0 +1,190 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+from threading import Lock
+from typing import Any, Callable
+from hashlib import sha256
+from time import time
+
+import sqlite3
+import json
+import os
+
+@dataclass(frozen = True)
+class CachedResponse:
+	"""Ответ сервера, восстановленный из кэша."""
+
+	status_code: int
+	text: str
+	headers: dict[str, str] = field(default_factory = dict)
+
+	@property
+	def ok(self) -> bool:
+		"""Состояние: успешен ли запрос."""
+
+		return 200 <= self.status_code < 400
+
+	@cached_property
+	def json(self) -> Any:
+		"""Десериализованное тело ответа. Разбирается при первом обращении."""
+
+		return json.loads(self.text)
+
+@dataclass
+class CacheStatistics:
+	"""Счётчики использования кэша."""
+
+	hits: int = 0
+	revalidations: int = 0
+	misses: int = 0
+	bytes_saved: int = 0
+
+class ResponsesCache:
+	"""Персистентный кэш ответов сервера с условной ревалидацией и вытеснением давно не использованных записей."""
+
+	@property
+	def statistics(self) -> CacheStatistics:
+		"""Счётчики использования кэша."""
+
+		return self.__Statistics
+
+	def __init__(self, path: str, ttl: float, max_size: int):
+		"""
+		Персистентный кэш ответов сервера с условной ревалидацией и вытеснением давно не использованных записей.
+
+		:param path: Путь к файлу базы данных кэша.
+		:type path: str
+		:param ttl: Время, в течение которого запись используется без ревалидации (в секундах).
+		:type ttl: float
+		:param max_size: Максимальный суммарный размер тел ответов (в байтах).
+		:type max_size: int
+		"""
+
+		os.makedirs(os.path.dirname(path), exist_ok = True)
+		self.__TTL = ttl
+		self.__MaxSize = max_size
+		self.__Statistics = CacheStatistics()
+		self.__Lock = Lock()
+
+		self.__Connection = sqlite3.connect(path, check_same_thread = False)
+		self.__Connection.execute(
+			"CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, hash TEXT, body TEXT, size INTEGER, stored_at REAL, accessed_at REAL)"
+		)
+		self.__Connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+		self.__Size = self.__Connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+	def __Evict(self):
+		"""Удаляет давно не использованные записи до соблюдения ограничения размера."""
+
+		while self.__Size > self.__MaxSize:
+			Row = self.__Connection.execute("SELECT url, size FROM responses ORDER BY accessed_at LIMIT 1").fetchone()
+			if not Row: break
+			self.__Connection.execute("DELETE FROM responses WHERE url = ?", (Row[0],))
+			self.__Size -= Row[1]
+
+	def __Touch(self, url: str, size: int, revalidated: bool):
+		"""
+		Отмечает использование записи.
+
+		:param url: Адрес запроса.
+		:type url: str
+		:param size: Размер тела ответа.
+		:type size: int
+		:param revalidated: Состояние: была ли запись ревалидирована сервером.
+		:type revalidated: bool
+		"""
+
+		Now = time()
+
+		with self.__Lock:
+			if revalidated: self.__Connection.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?", (Now, Now, url))
+			else: self.__Connection.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (Now, url))
+			self.__Connection.commit()
+
+			if revalidated: self.__Statistics.revalidations += 1
+			else: self.__Statistics.hits += 1
+			self.__Statistics.bytes_saved += size
+
+	def __Store(self, url: str, response: Any, previous_hash: str | None):
+		"""
+		Сохраняет ответ сервера.
+
+		:param url: Адрес запроса.
+		:type url: str
+		:param response: Ответ сервера.
+		:type response: Any
+		:param previous_hash: Хэш ранее сохранённого тела ответа.
+		:type previous_hash: str | None
+		"""
+
+		Headers = response.headers or dict()
+		Body: str = response.text
+		Size = len(Body.encode())
+		Hash = sha256(Body.encode()).hexdigest()
+		Now = time()
+
+		with self.__Lock:
+
+			if Hash == previous_hash:
+				# Тело не изменилось: перезапись не требуется.
+				self.__Connection.execute(
+					"UPDATE responses SET etag = ?, last_modified = ?, stored_at = ?, accessed_at = ? WHERE url = ?",
+					(Headers.get("etag"), Headers.get("last-modified"), Now, Now, url)
+				)
+
+			else:
+				Row = self.__Connection.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+				if Row: self.__Size -= Row[0]
+				self.__Connection.execute(
+					"INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+					(url, Headers.get("etag"), Headers.get("last-modified"), Hash, Body, Size, Now, Now)
+				)
+				self.__Size += Size
+				self.__Evict()
+
+			self.__Connection.commit()
+
+	def close(self):
+		"""Закрывает кэш."""
+
+		with self.__Lock: self.__Connection.close()
+
+	def get(self, url: str, requester: Callable[[dict[str, str]], Any]) -> Any:
+		"""
+		Возвращает ответ из кэша или выполняет запрос (при наличии записи – условный).
+
+		:param url: Адрес запроса.
+		:type url: str
+		:param requester: Функция выполнения запроса, принимающая словарь дополнительных заголовков.
+		:type requester: Callable[[dict[str, str]], Any]
+		:return: Ответ сервера или восстановленный из кэша.
+		:rtype: Any
+		"""
+
+		with self.__Lock:
+			Row = self.__Connection.execute(
+				"SELECT etag, last_modified, hash, body, size, stored_at FROM responses WHERE url = ?", (url,)
+			).fetchone()
+
+		Headers = dict()
+
+		if Row:
+			ETag, LastModified, Hash, Body, Size, StoredAt = Row
+
+			if time() - StoredAt < self.__TTL:
+				self.__Touch(url, Size, revalidated = False)
+				return CachedResponse(200, Body)
+
+			if ETag: Headers["If-None-Match"] = ETag
+			if LastModified: Headers["If-Modified-Since"] = LastModified
+
+		Response = requester(Headers)
+
+		if Row and Response.status_code == 304:
+			self.__Touch(url, Size, revalidated = True)
+			return CachedResponse(200, Body)
+
+		with self.__Lock: self.__Statistics.misses += 1
+
+		if Response.status_code == 200: self.__Store(url, Response, Row[2] if Row else None)
+
+		return Response
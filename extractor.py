@@ -0,0 +1,438 @@
+from Source.Core.Base.Parsers.Components import Functions
+
+from .instrumentation import Profiler
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer, Tag
+
+import multiprocessing
+import threading
+import atexit
+import json
+import re
+
+#==========================================================================================#
+# >>>>> ДАННЫЕ ЭЛЕМЕНТОВ ГЛАВЫ <<<<< #
+#==========================================================================================#
+
+@dataclass(frozen = True)
+class FootnoteReference:
+	"""Ссылка на заметку внутри текста элемента."""
+
+	id: str
+	html: str
+	placeholder: str
+
+@dataclass(frozen = True)
+class ElementData:
+	"""Облегчённое описание элемента главы, не зависящее от дерева HTML."""
+
+	type: str
+	attrs: dict = field(default_factory = dict)
+	segments: tuple[str | FootnoteReference] = tuple()
+	children: tuple["ElementData"] = tuple()
+
+	@property
+	def text(self) -> str:
+		"""Текст элемента с исходным кодом ссылок на заметки."""
+
+		return "".join(Segment if type(Segment) == str else Segment.html for Segment in self.segments)
+
+@dataclass(frozen = True)
+class ChapterContent:
+	"""Содержимое главы: элементы и тексты заметок."""
+
+	elements: tuple[ElementData]
+	footnotes: dict[str, str]
+
+#==========================================================================================#
+# >>>>> СЕРИАЛИЗАЦИЯ <<<<< #
+#==========================================================================================#
+
+def _DumpElement(element: ElementData) -> dict:
+	"""
+	Преобразует описание элемента в словарь.
+
+	:param element: Описание элемента.
+	:type element: ElementData
+	:return: Словарь описания.
+	:rtype: dict
+	"""
+
+	return {
+		"type": element.type,
+		"attrs": element.attrs,
+		"segments": [Segment if type(Segment) == str else [Segment.id, Segment.html, Segment.placeholder] for Segment in element.segments],
+		"children": [_DumpElement(Child) for Child in element.children]
+	}
+
+def _LoadElement(data: dict) -> ElementData:
+	"""
+	Восстанавливает описание элемента из словаря.
+
+	:param data: Словарь описания.
+	:type data: dict
+	:return: Описание элемента.
+	:rtype: ElementData
+	"""
+
+	Segments = tuple(Segment if type(Segment) == str else FootnoteReference(*Segment) for Segment in data["segments"])
+
+	return ElementData(data["type"], data["attrs"], Segments, tuple(_LoadElement(Child) for Child in data["children"]))
+
+def DumpContent(content: ChapterContent) -> str:
+	"""
+	Сериализует содержимое главы в JSON.
+
+	:param content: Содержимое главы.
+	:type content: ChapterContent
+	:return: Строка JSON.
+	:rtype: str
+	"""
+
+	return json.dumps({"elements": [_DumpElement(Element) for Element in content.elements], "footnotes": content.footnotes}, ensure_ascii = False)
+
+def LoadContent(text: str) -> ChapterContent:
+	"""
+	Восстанавливает содержимое главы из JSON.
+
+	:param text: Строка JSON.
+	:type text: str
+	:return: Содержимое главы.
+	:rtype: ChapterContent
+	"""
+
+	Data = json.loads(text)
+
+	return ChapterContent(tuple(_LoadElement(Element) for Element in Data["elements"]), Data["footnotes"])
+
+#==========================================================================================#
+# >>>>> ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ <<<<< #
+#==========================================================================================#
+
+_TagsFactory = BeautifulSoup("", "html.parser")
+_DivTokens = re.compile(r"<(/?)div\b", re.IGNORECASE)
+
+def CreateTag(name: str, attrs: dict) -> Tag:
+	"""
+	Создаёт пустой тег с указанными атрибутами.
+
+	:param name: Название тега.
+	:type name: str
+	:param attrs: Атрибуты тега.
+	:type attrs: dict
+	:return: Тег.
+	:rtype: Tag
+	"""
+
+	return _TagsFactory.new_tag(name, attrs = attrs)
+
+def _IsIgnored(tag: Tag, skip_breaks: bool) -> bool:
+	"""
+	Проверяет, исключается ли тег из текста элемента.
+
+	:param tag: Тег.
+	:type tag: Tag
+	:param skip_breaks: Состояние: исключаются ли переносы строк.
+	:type skip_breaks: bool
+	:return: Состояние исключения.
+	:rtype: bool
+	"""
+
+	return tag.name == "div" or skip_breaks and tag.name == "br"
+
+def _SerializeContents(tag: Tag, segments: list[str | FootnoteReference], skip_breaks: bool):
+	"""
+	Сериализует содержимое тега в сегменты текста без изменения дерева.
+
+	:param tag: Тег.
+	:type tag: Tag
+	:param segments: Список для записи сегментов.
+	:type segments: list[str | FootnoteReference]
+	:param skip_breaks: Состояние: исключаются ли переносы строк.
+	:type skip_breaks: bool
+	"""
+
+	for Child in tag.children:
+
+		if isinstance(Child, NavigableString):
+			segments.append(Child.output_ready(formatter = "minimal"))
+			continue
+
+		if _IsIgnored(Child, skip_breaks): continue
+
+		if Child.name == "a":
+			Href = Child.get("href")
+			if Href and Href.startswith("#"): segments.append(FootnoteReference(Href[1:], str(Child), Child.get_text().strip()))
+			else: segments.append(str(Child))
+			continue
+
+		if not Child.find(("a", "br", "div")):
+			segments.append(str(Child))
+			continue
+
+		# Теги оформления, содержащие ссылки или исключаемые теги, обходятся рекурсивно.
+		Closing = f"</{Child.name}>"
+		segments.append(str(CreateTag(Child.name, Child.attrs))[:-len(Closing)])
+		_SerializeContents(Child, segments, skip_breaks)
+		segments.append(Closing)
+
+def GetSegments(tag: Tag, skip_breaks: bool = True) -> tuple[str | FootnoteReference]:
+	"""
+	Возвращает содержимое тега в виде последовательности сегментов текста и ссылок на заметки.
+
+	:param tag: Тег.
+	:type tag: Tag
+	:param skip_breaks: Состояние: исключаются ли переносы строк.
+	:type skip_breaks: bool
+	:return: Сегменты с удалёнными пробельными символами по краям. Пустая последовательность означает отсутствие текста.
+	:rtype: tuple[str | FootnoteReference]
+	"""
+
+	Buffer = list()
+	_SerializeContents(tag, Buffer, skip_breaks)
+	Segments: list[str | FootnoteReference] = list()
+
+	for Segment in Buffer:
+		if type(Segment) == str and Segments and type(Segments[-1]) == str: Segments[-1] += Segment
+		else: Segments.append(Segment)
+
+	if Segments and type(Segments[0]) == str: Segments[0] = Segments[0].lstrip()
+	if Segments and type(Segments[-1]) == str: Segments[-1] = Segments[-1].rstrip()
+
+	return tuple(Segment for Segment in Segments if Segment != "")
+
+#==========================================================================================#
+# >>>>> ИЗВЛЕЧЕНИЕ КОНТЕНТА <<<<< #
+#==========================================================================================#
+
+def _SliceContainer(html: str, chapter_id: int) -> str:
+	"""
+	Вырезает из кода страницы фрагмент контейнера контента главы по балансу тегов `div`.
+
+	:param html: Код HTML страницы главы.
+	:type html: str
+	:param chapter_id: ID главы.
+	:type chapter_id: int
+	:return: Фрагмент кода с контейнером или исходный код, если контейнер не удалось обнаружить.
+	:rtype: str
+	"""
+
+	Position = html.find(f"data-container=\"{chapter_id}\"")
+	if Position == -1: return html
+	Start = html.rfind("<div", 0, Position)
+	if Start == -1: return html
+	Depth = 0
+
+	for Match in _DivTokens.finditer(html, Start):
+		Depth += -1 if Match.group(1) else 1
+		if not Depth: return html[Start:html.find(">", Match.end()) + 1]
+
+	return html[Start:]
+
+def FindContainer(html: str, chapter_id: int) -> tuple[BeautifulSoup, Tag] | None:
+	"""
+	Разбирает только контейнер контента главы, пропуская остальную страницу.
+
+	:param html: Код HTML страницы главы или сохранённого контейнера.
+	:type html: str
+	:param chapter_id: ID главы.
+	:type chapter_id: int
+	:return: Парсер и контейнер контента либо `None` при отсутствии контейнера.
+	:rtype: tuple[BeautifulSoup, Tag] | None
+	"""
+
+	Attributes = {"data-container": str(chapter_id)}
+	Soup = BeautifulSoup(_SliceContainer(html, chapter_id), "lxml", parse_only = SoupStrainer("div", attrs = Attributes))
+	Container = Soup.find("div", Attributes)
+
+	return (Soup, Container) if Container else None
+
+def FindGroupContainer(html: str, chapter_ids: tuple[int]) -> tuple[int, BeautifulSoup, Tag] | None:
+	"""
+	Разбирает контейнер первой из глав с общей страницей, контент которой на этой странице присутствует.
+
+	:param html: Код HTML страницы главы или сохранённого контейнера.
+	:type html: str
+	:param chapter_ids: ID глав в порядке проверки.
+	:type chapter_ids: tuple[int]
+	:return: ID главы, парсер и контейнер контента либо `None` при отсутствии контейнеров всех глав.
+	:rtype: tuple[int, BeautifulSoup, Tag] | None
+	"""
+
+	for ChapterID in chapter_ids:
+		Extracted = FindContainer(html, ChapterID)
+		if Extracted: return (ChapterID, *Extracted)
+
+def _GetFootnotes(container: Tag) -> dict[str, str]:
+	"""
+	Возвращает словарь текстов заметок.
+
+	:param container: Контейнер контента главы.
+	:type container: Tag
+	:return: Словарь, в котором ключ – ID заметки на сайте, а значение – её текст.
+	:rtype: dict[str, str]
+	"""
+
+	Footnotes = dict()
+
+	# Заметки всех списков главы индексируются за один проход.
+	for Item in container.find_all("li", id = True):
+		# Списки внутри элементов интерфейса не относятся к контенту.
+		if not Item.find_parent("ol") or Item.find_parent("div") is not container: continue
+		Backlink = Item.find("a")
+		Excluded = {id(String) for String in Backlink.strings} if Backlink else set()
+		Footnotes[Item.attrs["id"]] = "".join(String for String in Item.strings if id(String) not in Excluded)
+
+	return Footnotes
+
+def _ParseParagraphs(soup: BeautifulSoup, tag: Tag, profiler: Profiler) -> list[ElementData]:
+	"""
+	Разбирает тег абзаца, разделяя его по правилам Melon.
+
+	:param soup: Парсер контейнера.
+	:type soup: BeautifulSoup
+	:param tag: Тег абзаца.
+	:type tag: Tag
+	:param profiler: Сборщик времени выполнения стадий.
+	:type profiler: Profiler
+	:return: Список описаний абзацев.
+	:rtype: list[ElementData]
+	"""
+
+	# Нормализаторы Melon изменяют абзац, поэтому элементы интерфейса удаляются заранее.
+	for Trash in tag.find_all("div"): Trash.decompose()
+	Paragraphs = list()
+
+	with profiler.stage("normalize"): SplitParagraphs = Functions.SplitParagraph(soup, Functions.UnwrapInnerTags(tag))
+
+	for CurrentParagraph in SplitParagraphs:
+		Segments = GetSegments(CurrentParagraph)
+		if Segments: Paragraphs.append(ElementData("paragraph", dict(CurrentParagraph.attrs), Segments))
+
+	return Paragraphs
+
+def _ParseSimpleElement(tag: Tag) -> ElementData | None:
+	"""
+	Разбирает тег абзаца внутри цитаты, заголовка или изображения.
+
+	:param tag: Тег.
+	:type tag: Tag
+	:return: Описание элемента или `None` при отсутствии текста.
+	:rtype: ElementData | None
+	"""
+
+	match tag.name:
+		case "img": return ElementData("image", dict(tag.attrs))
+		case "h3": Type = "header"
+		case _: Type = "paragraph"
+
+	Segments = GetSegments(tag, skip_breaks = Type == "paragraph")
+
+	return ElementData(Type, dict(tag.attrs), Segments) if Segments else None
+
+def ExtractChapter(soup: BeautifulSoup, container: Tag, profiler: Profiler | None = None) -> ChapterContent:
+	"""
+	Преобразует контейнер контента главы в описания элементов за один обход.
+
+	:param soup: Парсер контейнера.
+	:type soup: BeautifulSoup
+	:param container: Контейнер контента главы.
+	:type container: Tag
+	:param profiler: Сборщик времени выполнения стадий.
+	:type profiler: Profiler | None
+	:return: Содержимое главы.
+	:rtype: ChapterContent
+	"""
+
+	profiler = profiler or Profiler()
+	with profiler.stage("footnotes"): Footnotes = _GetFootnotes(container)
+	Elements = list()
+
+	for CurrentTag in container.find_all(("p", "h3", "img", "blockquote"), recursive = False):
+
+		match CurrentTag.name:
+			case "p": Elements += _ParseParagraphs(soup, CurrentTag, profiler)
+
+			case "blockquote":
+				Children = (_ParseSimpleElement(Child) for Child in CurrentTag.find_all(("p", "img"), recursive = False))
+				Elements.append(ElementData("blockquote", children = tuple(Child for Child in Children if Child)))
+
+			case _:
+				Element = _ParseSimpleElement(CurrentTag)
+				if Element: Elements.append(Element)
+
+	return ChapterContent(tuple(Elements), Footnotes)
+
+#==========================================================================================#
+# >>>>> РАЗБОР В ПУЛЕ ПРОЦЕССОВ <<<<< #
+#==========================================================================================#
+
+def CreateParsingPool(workers: int) -> ProcessPoolExecutor:
+	"""
+	Создаёт пул процессов разбора страниц глав. Завершение работы пула возлагается на вызывающую сторону.
+
+	Копирование процесса (fork) используется только при единственном работающем потоке, так как копирование процесса с работающими потоками небезопасно. В остальных случаях процессы порождаются сервером (forkserver) или запускаются заново (spawn). Процессы порождаются сразу после создания пула.
+
+	:param workers: Количество процессов.
+	:type workers: int
+	:return: Пул процессов.
+	:rtype: ProcessPoolExecutor
+	"""
+
+	Methods = multiprocessing.get_all_start_methods()
+	if threading.active_count() == 1 and "fork" in Methods: Context = multiprocessing.get_context("fork")
+	else: Context = multiprocessing.get_context("forkserver" if "forkserver" in Methods else "spawn")
+	Pool = ProcessPoolExecutor(workers, Context)
+	Pool.submit(int).result()
+
+	return Pool
+
+_ParsingPools: dict[int, ProcessPoolExecutor] = dict()
+_ParsingPoolsLock = threading.Lock()
+
+def GetParsingPool(workers: int) -> ProcessPoolExecutor:
+	"""
+	Возвращает общий для процесса пул процессов разбора страниц глав, чтобы парсеры не порождали собственные процессы. Пулы завершают работу при выходе из интерпретатора.
+
+	:param workers: Количество процессов.
+	:type workers: int
+	:return: Пул процессов.
+	:rtype: ProcessPoolExecutor
+	"""
+
+	with _ParsingPoolsLock:
+		if workers not in _ParsingPools: _ParsingPools[workers] = CreateParsingPool(workers)
+
+		return _ParsingPools[workers]
+
+@atexit.register
+def _ShutdownParsingPools():
+	"""Завершает работу общих пулов процессов разбора."""
+
+	with _ParsingPoolsLock:
+		for Pool in _ParsingPools.values(): Pool.shutdown(cancel_futures = True)
+		_ParsingPools.clear()
+
+def ParseChapterPage(html: str, chapter_ids: tuple[int], keep_container: bool = False) -> tuple[int, str | None, str] | None:
+	"""
+	Извлекает содержимое главы из кода страницы. Выполняется в пуле процессов, поэтому возвращает только простые значения.
+
+	:param html: Код HTML страницы главы или сохранённого контейнера.
+	:type html: str
+	:param chapter_ids: ID глав с общей страницей в порядке проверки (подробнее в `FindGroupContainer()`).
+	:type chapter_ids: tuple[int]
+	:param keep_container: Состояние: возвращать ли код контейнера для сохранения в хранилище глав.
+	:type keep_container: bool
+	:return: ID главы, которой принадлежит контент, код контейнера и сериализованное содержимое главы либо `None` при отсутствии контейнера.
+	:rtype: tuple[int, str | None, str] | None
+	"""
+
+	Extracted = FindGroupContainer(html, chapter_ids)
+	if not Extracted: return
+	ChapterID, Soup, Container = Extracted
+	ContainerHTML = str(Container) if keep_container else None
+
+	return ChapterID, ContainerHTML, DumpContent(ExtractChapter(Soup, Container))
@@ -0,0 +1,87 @@
+from contextlib import contextmanager
+from time import perf_counter, thread_time, time
+from threading import Lock
+from typing import Iterator
+
+import json
+import os
+
+class Profiler:
+	"""Сборщик времени выполнения стадий и счётчиков парсера."""
+
+	@property
+	def enabled(self) -> bool:
+		"""Состояние: включён ли сбор данных."""
+
+		return self.__Enabled
+
+	def __init__(self, enabled: bool = False):
+		"""
+		Сборщик времени выполнения стадий и счётчиков парсера.
+
+		:param enabled: Состояние: включён ли сбор данных. Выключенный сборщик не выполняет замеров.
+		:type enabled: bool
+		"""
+
+		self.__Enabled = enabled
+		self.__Lock = Lock()
+		self.__Stages: dict[str, dict[str, float]] = dict()
+		self.__Counters: dict[str, int] = dict()
+
+	def count(self, name: str, value: int = 1):
+		"""
+		Увеличивает счётчик.
+
+		:param name: Название счётчика.
+		:type name: str
+		:param value: Величина увеличения.
+		:type value: int
+		"""
+
+		if not self.__Enabled: return
+		with self.__Lock: self.__Counters[name] = self.__Counters.get(name, 0) + value
+
+	def flush(self, path: str, **fields):
+		"""
+		Дописывает собранные данные строкой JSON в файл и сбрасывает их.
+
+		:param path: Путь к файлу отчёта в формате JSON Lines.
+		:type path: str
+		:param fields: Дополнительные поля записи.
+		"""
+
+		if not self.__Enabled: return
+
+		with self.__Lock:
+			Record = {"timestamp": time(), **fields, "stages": self.__Stages, "counters": self.__Counters}
+			self.__Stages = dict()
+			self.__Counters = dict()
+
+		os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+		with open(path, "a", encoding = "utf-8") as FileWriter: FileWriter.write(json.dumps(Record, ensure_ascii = False) + "\n")
+
+	@contextmanager
+	def stage(self, name: str) -> Iterator[None]:
+		"""
+		Замеряет астрономическое и процессорное время потока для блока кода. Стадии могут быть вложенными.
+
+		:param name: Название стадии.
+		:type name: str
+		"""
+
+		if not self.__Enabled:
+			yield
+			return
+
+		WallStart, CPUStart = perf_counter(), thread_time()
+
+		try: yield
+
+		finally:
+			WallTime, CPUTime = perf_counter() - WallStart, thread_time() - CPUStart
+
+			with self.__Lock:
+				Stage = self.__Stages.setdefault(name, {"calls": 0, "wall": 0.0, "cpu": 0.0})
+				Stage["calls"] += 1
+				Stage["wall"] += WallTime
+				Stage["cpu"] += CPUTime
@@ -1,7 +1,19 @@
 from Source.Core.Base.SourceOperator import BaseSourceOperator
 
+from .network import GetRateController, RateController
+from .storage import CatalogIndex, TitlesQueue, UpdatesJournal
+from .scheduling import GetPriority, PrioritizeUpdates, ScoreUpdates, UpdateNote
+from .instrumentation import Profiler
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 from datetime import datetime
-from time import sleep
+from time import time
+
+import os
+
+# Срок хранения записей журнала обновлений (в секундах) для тайтлов, которые так и не были обработаны парсером.
+_JournalRetention = 30 * 24 * 3600
 
 class SourceOperator(BaseSourceOperator):
 	"""Оператор источника."""
@@ -10,92 +22,269 @@ class SourceOperator(BaseSourceOperator):
 	# >>>>> ПРИВАТНЫЕ МЕТОДЫ КОЛЛЕКЦИОНИРОВАНИЯ <<<<< #
 	#==========================================================================================#
 
-	def __Collect(self, filters: str | None = None, pages: int | None = None) -> tuple[str]:
+	def __Collect(self, filters: str | None = None, pages: int | None = None) -> Iterator[str]:
 		"""
-		Собирает список тайтлов по заданным параметрам.
+		Постранично собирает список тайтлов по заданным параметрам.
+
+		Если количество страниц известно из параметра `pages` или данных пагинации первой страницы, остальные страницы запрашиваются параллельно, но выдаются в порядке каталога.
 
 		:param filters: Строка из URI каталога, описывающая параметры запроса.
 		:type filters: str | None
 		:param pages: Количество запрашиваемых страниц.
 		:type pages: int | None
 		:raises ParsingError: Выбрасывается при ошибке коллекционирования.
-		:return: Набор алиасов собранных тайтлов.
-		:rtype: tuple[str]
+		:return: Генератор алиасов собранных тайтлов, выдающий их по мере получения страниц.
+		:rtype: Iterator[str]
 		"""
 
-		Slugs = list()
-		Page = 1
-
 		if filters: filters = "&" + filters.strip("&")
 		else: filters = ""
-		
-		while True:
-			PageQuery = f"&page={Page}" if Page != 1 else ""
-			Response = self._Requestor.get(f"https://{self._Manifest.site}/api/search?{filters}{PageQuery}".lstrip("?"))
-			if not Response.ok: self._Portals.request_error(Response, "Unable to request catalog.")
 
-			CatalogNotes = Response.json["resource"]
-			if not CatalogNotes: break
+		Workers = self._Settings.custom.get("collect_workers", 1)
+		Index = CatalogIndex(self._Temper.parser_temp) if self._Settings.custom.get("catalog_index", False) else None
+
+		try:
+			Data = self.__RequestCatalogPage(filters, 1)
+			if not Data["resource"]: return
+			yield from self.__GetCatalogSlugs(Data["resource"], Index)
+			if pages == 1: return
+			self._Portals.collect_progress_by_page(1)
+
+			PagesCount = self.__GetPagesCount(Data)
+			if pages: PagesCount = min(pages, PagesCount) if PagesCount else pages
+
+			if Workers > 1 and PagesCount:
+				Executor = ThreadPoolExecutor(Workers, "ranobehub-collect")
+				Pages = range(2, PagesCount + 1)
+
+				try:
+					for Page, PageData in zip(Pages, Executor.map(lambda Page: self.__RequestCatalogPage(filters, Page), Pages)):
+						if not PageData["resource"]: break
+						yield from self.__GetCatalogSlugs(PageData["resource"], Index)
+						if Page != pages: self._Portals.collect_progress_by_page(Page)
+
+				finally: Executor.shutdown(wait = True, cancel_futures = True)
+
+				return
+
+			Page = 2
+		
+			while True:
+				CatalogNotes = self.__RequestCatalogPage(filters, Page)["resource"]
+				if not CatalogNotes: break
 
-			for Note in CatalogNotes: Slugs.append(Note["url"].split("/ranobe/")[-1])
+				yield from self.__GetCatalogSlugs(CatalogNotes, Index)
 
-			if Page == pages: break
-			self._Portals.collect_progress_by_page(Page)
-			Page += 1
-			sleep(self._Settings.common.delay)
+				if Page == pages: break
+				self._Portals.collect_progress_by_page(Page)
+				Page += 1
 
-		return tuple(Slugs)
+		finally:
+			if Index: Index.close()
 
-	def __CollectUpdates(self, period: int, pages: int | None = None) -> tuple[str]:
+	def __CollectUpdates(self, period: int, pages: int | None = None) -> Iterator[UpdateNote]:
 		"""
-		Собирает алиасы тайтлов, обновлённых за указанный период времени (в часах).
+		Постранично собирает данные планирования тайтлов, обновлённых за указанный период времени (в часах).
+
+		При включённом индексе каталога и наличии в нём отметки собираются все обновления, появившиеся после предыдущего полного сбора, независимо от периода, о чём выводится сообщение.
 
 		:param period: Количество часов до текущего момента, составляющее период получения данных.
 		:type period: int
 		:param pages: Количество запрашиваемых страниц.
 		:type pages: int | None
-		:return: Последовательность алиасов тайтлов.
-		:rtype: tuple[str]
+		:return: Генератор данных обновлений, выдающий их по мере получения страниц. Один тайтл может встретиться несколько раз.
+		:rtype: Iterator[UpdateNote]
 		:raises ParsingError: Выбрасывается при ошибке получения обновлений.
 		"""
 
-		Slugs = list()
 		Page = 1
-		Now = datetime.now()
-		period = period * 3600
 		IsCollected = False
-		
-		while not IsCollected:
-			# Первая страница не должна иметь параметра page.
-			PageQuery = f"&page={Page}" if Page != 1 else ""
-			Response = self._Requestor.get(f"https://{self._Manifest.site}/api/feed?take=40{PageQuery}")
-			if not Response.ok: self._Portals.request_error(Response, "Unable to request updates.")
+		IsCutoffReached = False
+		Journal = UpdatesJournal(self._Temper.parser_temp) if self._Settings.custom.get("incremental_updates", False) else None
+		Index = CatalogIndex(self._Temper.parser_temp) if self._Settings.custom.get("catalog_index", False) else None
+		Watermark = Index.watermark if Index else None
+		NewWatermark = Watermark or 0
+
+		# При наличии отметки индекса собираются ровно те обновления, что новее неё.
+		Cutoff = Watermark if Watermark is not None else datetime.now().timestamp() - period * 3600
+		if Watermark is not None: self._Portals.info(f"Collecting updates since catalog index watermark {datetime.fromtimestamp(Watermark)}, period of {period} hours is ignored.")
+		if Journal: Journal.prune(int(datetime.now().timestamp()) - _JournalRetention)
+
+		try:
+			while not IsCollected:
+				# Первая страница не должна иметь параметра page.
+				PageQuery = f"&page={Page}" if Page != 1 else ""
+				Response = self.__Request(f"https://{self._Manifest.site}/api/feed?take=40{PageQuery}")
+				if not Response.ok: self._Portals.request_error(Response, "Unable to request updates.")
+				if not Response.json["resource"]: break
+				Notes = list()
+
+				for Note in Response.json["resource"]:
+					for NoteElement in Note["items"]:
+						Slug = NoteElement["ranobe"]["url"].split("/ranobe/")[-1]
+						LastUpdate = NoteElement["updates"][0]["created_at"]
+
+						if LastUpdate > Cutoff:
+							NewChapters = sum(1 for Update in NoteElement["updates"] if Update["created_at"] > Cutoff)
+							Notes.append(UpdateNote(Slug, int(Slug.split("-")[0]), LastUpdate, NewChapters))
+							NewWatermark = max(NewWatermark, LastUpdate)
+							if Index: Index.update(Slug, int(Slug.split("-")[0]), LastUpdate)
+
+						else: IsCollected = IsCutoffReached = True
+
+						if Journal: self.__JournalUpdates(Journal, Slug, NoteElement["updates"], Cutoff)
 
-			for Note in Response.json["resource"]:
-				for NoteElement in Note["items"]:
-					Slug = NoteElement["ranobe"]["url"].split("/ranobe/")[-1]
-					LastUpdate = NoteElement["updates"][0]
-					UpdateDate = datetime.fromtimestamp(LastUpdate["created_at"])
-					Delta = Now - UpdateDate
+				# Журнал сохраняется до выдачи алиасов, чтобы парсер тайтлов страницы уже видел их обновления.
+				if Journal: Journal.save()
+				if Index: Index.commit()
+				self._Portals.collect_progress_by_page(Page)
+				Page += 1
+				if pages and Page > pages: IsCollected = True
+
+				if Index:
+					# Количество глав записывается парсером при обработке тайтла.
+					Sizes = Index.sizes(Note.slug for Note in Notes)
+					Notes = [UpdateNote(Note.slug, Note.id, Note.updated_at, Note.new_chapters, Sizes.get(Note.slug)) for Note in Notes]
+
+				yield from Notes
+
+			# Отметка сдвигается только после полного просмотра ленты до неё, иначе пропущенные страницы были бы потеряны.
+			if Index and IsCutoffReached and NewWatermark: Index.set_watermark(NewWatermark)
+
+		finally:
+			if Index: Index.close()
+			if Journal: Journal.close()
+
+	def __GetCatalogSlugs(self, notes: list[dict], index: CatalogIndex | None) -> list[str]:
+		"""
+		Получает алиасы тайтлов страницы каталога и заносит их в индекс.
+
+		:param notes: Записи страницы каталога.
+		:type notes: list[dict]
+		:param index: Индекс каталога.
+		:type index: CatalogIndex | None
+		:return: Алиасы тайтлов.
+		:rtype: list[str]
+		"""
 
-					if Delta.total_seconds() <= period: Slugs.append(Slug)
-					else: IsCollected = True
+		Slugs = [Note["url"].split("/ranobe/")[-1] for Note in notes]
 
-			self._Portals.collect_progress_by_page(Page)
-			Page += 1
-			if pages and Page > pages: IsCollected = True
-			sleep(self._Settings.common.delay)
+		if index:
+			for Slug in Slugs: index.update(Slug, int(Slug.split("-")[0]))
+			index.commit()
 
-		return tuple(Slugs)
+		return Slugs
+
+	def __GetPagesCount(self, data: dict) -> int | None:
+		"""
+		Определяет количество страниц каталога по данным пагинации.
+
+		:param data: Данные страницы каталога.
+		:type data: dict
+		:return: Количество страниц или `None`, если данные пагинации отсутствуют.
+		:rtype: int | None
+		"""
+
+		for Key in ("meta", "pagination"):
+			Pagination = data.get(Key)
+			if not isinstance(Pagination, dict): continue
+
+			for PagesKey in ("last_page", "total_pages"):
+				if Pagination.get(PagesKey): return int(Pagination[PagesKey])
+
+	def __GetRateController(self) -> RateController:
+		"""
+		Возвращает общий контроллер частоты запросов к источнику.
+
+		:return: Контроллер частоты запросов.
+		:rtype: RateController
+		"""
+
+		return GetRateController(self._Manifest.site, self._Settings.common.delay, self._Settings.custom.get("max_rate"))
+
+	def __JournalUpdates(self, journal: UpdatesJournal, slug: str, updates: list[dict], cutoff: float):
+		"""
+		Заносит в журнал главы тайтла, обновлённые после указанного момента.
+
+		:param journal: Журнал обновлений.
+		:type journal: UpdatesJournal
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:param updates: Список обновлений тайтла из ленты.
+		:type updates: list[dict]
+		:param cutoff: Время в формате UNIX, более ранние обновления не заносятся.
+		:type cutoff: float
+		"""
+
+		for Update in updates:
+			Timestamp = Update["created_at"]
+			if Timestamp <= cutoff: continue
+			# Глава сопоставляется парсером как по алиасу, так и по ID.
+			if Update.get("url"): journal.add(slug, Update["url"].split("ranobe/")[-1], Timestamp)
+			if Update.get("id"): journal.add(slug, str(Update["id"]), Timestamp)
+
+	def __RequestCatalogPage(self, filters: str, page: int) -> dict:
+		"""
+		Запрашивает страницу каталога.
+
+		:param filters: Подготовленная строка параметров запроса.
+		:type filters: str
+		:param page: Номер страницы.
+		:type page: int
+		:raises ParsingError: Выбрасывается при ошибке запроса.
+		:return: Данные страницы каталога.
+		:rtype: dict
+		"""
+
+		# Первая страница не должна иметь параметра page.
+		PageQuery = f"&page={page}" if page != 1 else ""
+		Response = self.__Request(f"https://{self._Manifest.site}/api/search?{filters}{PageQuery}".lstrip("?"))
+		if not Response.ok: self._Portals.request_error(Response, "Unable to request catalog.")
+
+		return Response.json
+
+	def __Request(self, url: str):
+		"""
+		Выполняет запрос GET через общий контроллер частоты запросов.
+
+		:param url: Адрес запроса.
+		:type url: str
+		:return: Ответ сервера.
+		:rtype: WebResponse
+		"""
+
+		with self.__Profiler.stage("network"): Response = self.__GetRateController().request(self._Requestor.get, url)
+		self.__Profiler.count("requests")
+		self.__Profiler.count("bytes_downloaded", len(Response.content or b""))
+
+		return Response
 
 	#==========================================================================================#
 	# >>>>> ПУБЛИЧНЫЕ МЕТОДЫ <<<<< #
 	#==========================================================================================#
 
+	def changed_since(self, timestamp: int) -> tuple[str]:
+		"""
+		Возвращает алиасы тайтлов, обновлённых после указанного момента, по локальному индексу каталога без запросов к источнику.
+
+		:param timestamp: Время в формате UNIX.
+		:type timestamp: int
+		:return: Алиасы тайтлов в порядке от новых к старым.
+		:rtype: tuple[str]
+		"""
+
+		Index = CatalogIndex(self._Temper.parser_temp)
+		Slugs = Index.changed_since(timestamp)
+		Index.close()
+
+		return Slugs
+
 	def collect(self, period: int | None = None, filters: str | None = None, pages: int | None = None) -> tuple[str]:
 		"""
 		Собирает список алиасов тайтлов по заданным параметрам.
 
+		При указании периода алиасы обновлённых тайтлов упорядочиваются планировщиком (подробнее в `schedule()`).
+
 		:param period: Количество часов до текущего момента, составляющее период получения данных.
 		:type period: int | None
 		:param filters: Строка, описывающая фильтрацию (подробнее в README.md парсера).
@@ -106,6 +295,144 @@ class SourceOperator(BaseSourceOperator):
 		:rtype: tuple[str]
 		"""
 
-		Slugs = self.__Collect(filters, pages) if not period else self.__CollectUpdates(period, pages)
+		if period: return self.schedule(period, pages)
+
+		return tuple(self.collect_stream(period, filters, pages))
+
+	def collect_updates(self, period: int, pages: int | None = None) -> tuple[UpdateNote]:
+		"""
+		Собирает данные планирования тайтлов, обновлённых за указанный период времени (в часах): время последнего обновления, количество новых глав и известное по индексу каталога количество глав.
+
+		:param period: Количество часов до текущего момента, составляющее период получения данных.
+		:type period: int
+		:param pages: Количество запрашиваемых страниц ленты.
+		:type pages: int | None
+		:return: Данные обновлений в порядке ленты, по одной записи на тайтл.
+		:rtype: tuple[UpdateNote]
+		"""
+
+		self.__Profiler = Profiler(self._Settings.custom.get("instrumentation", False))
+		Notes: dict[str, UpdateNote] = dict()
+
+		with self.__Profiler.stage("collect"):
+			for Note in self.__CollectUpdates(period, pages): Notes[Note.slug] = Notes[Note.slug].merge(Note) if Note.slug in Notes else Note
+
+		self.__Profiler.count("slugs", len(Notes))
+		MetricsPath = self._Settings.custom.get("instrumentation_path") or os.path.join(self._Temper.parser_temp, "metrics.jsonl")
+		self.__Profiler.flush(MetricsPath, kind = "collect", mode = "updates")
+
+		return tuple(Notes.values())
+
+	def collect_stream(self, period: int | None = None, filters: str | None = None, pages: int | None = None) -> Iterator[str]:
+		"""
+		Собирает алиасы тайтлов по заданным параметрам, выдавая их по мере получения страниц каталога или ленты обновлений. Повторяющиеся алиасы пропускаются.
+
+		:param period: Количество часов до текущего момента, составляющее период получения данных.
+		:type period: int | None
+		:param filters: Строка, описывающая фильтрацию (подробнее в README.md парсера).
+		:type filters: str | None
+		:param pages: Количество запрашиваемых страниц каталога.
+		:type pages: int | None
+		:return: Генератор уникальных алиасов.
+		:rtype: Iterator[str]
+		"""
+
+		self.__Profiler = Profiler(self._Settings.custom.get("instrumentation", False))
+		Slugs = self.__Collect(filters, pages) if not period else (Note.slug for Note in self.__CollectUpdates(period, pages))
+		CollectedSlugs = set()
+
+		# Время выдачи алиасов потребителю в стадию не входит.
+		while True:
+			with self.__Profiler.stage("collect"): Slug = next(Slugs, None)
+			if Slug is None: break
+			if Slug in CollectedSlugs: continue
+			CollectedSlugs.add(Slug)
+			self.__Profiler.count("slugs")
+			yield Slug
+
+		Statistics = self.__GetRateController().statistics
+		self._Portals.info(f"Requests rate: {Statistics.effective_rate:.2f}/s effective, {Statistics.current_rate:.2f}/s current, {Statistics.backoffs} backoffs.")
+		MetricsPath = self._Settings.custom.get("instrumentation_path") or os.path.join(self._Temper.parser_temp, "metrics.jsonl")
+		self.__Profiler.flush(MetricsPath, kind = "collect", mode = "updates" if period else "catalog")
+
+	def enqueue(self, period: int | None = None, filters: str | None = None, pages: int | None = None) -> int:
+		"""
+		Собирает алиасы тайтлов по заданным параметрам и ставит их в общую очередь обработки. Уже находящиеся в очереди тайтлы не дублируются.
+
+		Обновления ставятся в очередь с приоритетами планировщика (подробнее в `schedule()`). Тайтлы каталога получают приоритет обновления без новых глав, появившегося в момент постановки в очередь, поэтому уже ожидающие обновления выдаются раньше них.
+
+		:param period: Количество часов до текущего момента, составляющее период получения данных.
+		:type period: int | None
+		:param filters: Строка, описывающая фильтрацию (подробнее в README.md парсера).
+		:type filters: str | None
+		:param pages: Количество запрашиваемых страниц каталога.
+		:type pages: int | None
+		:return: Количество поставленных в очередь тайтлов.
+		:rtype: int
+		"""
+
+		Queue = self.open_queue()
+		Aging = self._Settings.custom.get("schedule_aging", 1.0)
+		Count = 0
+
+		# Приоритеты вычисляются относительно начала эпохи, чтобы оставаться сравнимыми между сборами.
+		if period:
+			for Priority, Note in ScoreUpdates(self.collect_updates(period, pages), 0, Aging):
+				Queue.enqueue(Note.slug, Note.id, Priority)
+				Count += 1
+
+		else:
+			for Slug in self.collect_stream(period, filters, pages):
+				Note = UpdateNote(Slug, int(Slug.split("-")[0]), int(time()), 0)
+				Queue.enqueue(Note.slug, Note.id, GetPriority(Note, 0, Aging))
+				Count += 1
+
+		Queue.close()
+
+		return Count
+
+	def open_queue(self) -> TitlesQueue:
+		"""
+		Открывает общую очередь тайтлов, путь к которой задаётся настройкой `queue_path`.
+
+		:return: Очередь тайтлов.
+		:rtype: TitlesQueue
+		"""
+
+		return TitlesQueue(self._Settings.custom.get("queue_path") or os.path.join(self._Temper.parser_temp, "queue.sqlite"))
+
+	def schedule(self, period: int, pages: int | None = None) -> tuple[str]:
+		"""
+		Собирает тайтлы, обновлённые за указанный период времени (в часах), и упорядочивает их для обработки.
+
+		Сначала обрабатываются обновления с меньшим объёмом работы (новые главы и размер тайтла), а приоритет ожидающих растёт на `schedule_aging` за час, поэтому крупные тайтлы не откладываются бесконечно.
+
+		:param period: Количество часов до текущего момента, составляющее период получения данных.
+		:type period: int
+		:param pages: Количество запрашиваемых страниц ленты.
+		:type pages: int | None
+		:return: Алиасы тайтлов в порядке обработки.
+		:rtype: tuple[str]
+		"""
+
+		Notes = PrioritizeUpdates(self.collect_updates(period, pages), aging = self._Settings.custom.get("schedule_aging", 1.0))
+
+		return tuple(Note.slug for Note in Notes)
+
+	def title_size(self, slug: str) -> int:
+		"""
+		Определяет количество глав тайтла для планирования пакетной обработки по локальному индексу каталога без запросов к источнику.
+
+		Количество глав записывается в индекс парсером при обработке тайтла, если включена настройка `catalog_index`.
+
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:return: Количество глав или 0, если оно неизвестно.
+		:rtype: int
+		"""
+
+		Index = CatalogIndex(self._Temper.parser_temp)
+		Size = Index.sizes((slug,)).get(slug, 0)
+		Index.close()
 
-		return Slugs
\ No newline at end of file
+		return Size
\ No newline at end of file
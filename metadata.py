@@ -0,0 +1,102 @@
+from Source.Core.Base.Formats.BaseFormat import Statuses
+
+from dataclasses import dataclass
+
+from lxml import etree
+from lxml.html import fragment_fromstring
+
+import re
+
+#==========================================================================================#
+# >>>>> ДАННЫЕ ТАЙТЛА <<<<< #
+#==========================================================================================#
+
+@dataclass(frozen = True)
+class TitleMetadata:
+	"""Описательные данные тайтла."""
+
+	localized_name: str
+	eng_name: str
+	another_names: tuple[str]
+	posters: dict[str, str]
+	authors: tuple[str]
+	publication_year: int
+	description: str
+	original_language: str | None
+	status: Statuses
+	genres: tuple[str]
+	tags: tuple[str]
+	age_limit: int | None
+	rating: str | None
+
+#==========================================================================================#
+# >>>>> ИЗВЛЕЧЕНИЕ ДАННЫХ <<<<< #
+#==========================================================================================#
+
+_Languages = {
+	"china": "zho",
+	"kr": "kor",
+	"japan": "jpn",
+	"us": "eng"
+}
+
+_Statuses = {
+	"В процессе": Statuses.ongoing,
+	"Заморожено": Statuses.dropped,
+	"Завершено": Statuses.completed
+}
+
+_Ratings = {
+	"18+": 18,
+	"R-15 (Японское возрастное ограничение)": 15
+}
+
+_AnotherNamesSelector = etree.XPath(".//a[@class = 'ui header tiny grey']")
+_FlagSelector = etree.XPath("(.//i)[1]")
+_ParagraphsSelector = etree.XPath(".//p")
+# Повторяет очистку `dublib.Polyglot.HTML.plain_text` для уже декодированного парсером текста.
+_TagsAndEntities = re.compile("<.*?>|&([a-z0-9]+|#[0-9]{1,6}|#x[0-9a-f]{1,6});")
+
+def ExtractMetadata(data: dict) -> TitleMetadata:
+	"""
+	Извлекает данные тайтла из ответа API. HTML-секция и описание разбираются как отдельные фрагменты, чтобы незакрытые теги одного не влияли на другой.
+
+	Абзацы описания разделяются по правилам lxml: в отличие от `html.parser`, вложенный абзац закрывает внешний, поэтому текст некорректно вложенных абзацев не дублируется.
+
+	:param data: Словарь данных тайтла.
+	:type data: dict
+	:return: Данные тайтла.
+	:rtype: TitleMetadata
+	"""
+
+	Section = fragment_fromstring(data["html"] or "", create_parent = "div")
+	AnotherNames = tuple()
+	OriginalLanguage = None
+
+	Names = _AnotherNamesSelector(Section)
+	if Names: AnotherNames = tuple(Name.strip() for Name in Names[0].text_content().split(" / "))
+	Flag = _FlagSelector(Section)
+	if Flag: OriginalLanguage = _Languages[Flag[0].get("class").split()[0]]
+
+	DescriptionBlock = fragment_fromstring(data["description"] or "", create_parent = "div")
+	Description = [_TagsAndEntities.sub("", Paragraph.text_content()).strip() for Paragraph in _ParagraphsSelector(DescriptionBlock)]
+
+	Tags = tuple(Tag["title"] for Tag in data["tags"]["events"])
+	Rating = next((Rating for Rating in _Ratings if Rating in Tags), None)
+	Posters = {Key: Link for Key, Link in data["posters"].items() if Key != "color"}
+
+	return TitleMetadata(
+		localized_name = data["names"]["rus"],
+		eng_name = data["names"]["eng"],
+		another_names = AnotherNames,
+		posters = Posters,
+		authors = tuple(Author["name_eng"] for Author in data["authors"]),
+		publication_year = data["year"],
+		description = "\n".join(Description),
+		original_language = OriginalLanguage,
+		status = _Statuses[data["status"]["title"]],
+		genres = tuple(Genre["title"] for Genre in data["tags"]["genres"]),
+		tags = Tags,
+		age_limit = _Ratings[Rating] if Rating else None,
+		rating = Rating
+	)
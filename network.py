@@ -0,0 +1,319 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic, sleep
+from typing import Any, Callable, Iterable
+
+#==========================================================================================#
+# >>>>> УПРАВЛЕНИЕ ЧАСТОТОЙ ЗАПРОСОВ <<<<< #
+#==========================================================================================#
+
+@dataclass(frozen = True)
+class RateStatistics:
+	"""Статистика контроллера частоты запросов."""
+
+	requests: int
+	backoffs: int
+	effective_rate: float
+	current_rate: float
+
+class RateController:
+	"""
+	Потокобезопасный адаптивный контроллер частоты запросов к источнику.
+
+	Запросы выпускаются по алгоритму маркерной корзины. Частота аддитивно растёт при быстрых успешных ответах и мультипликативно снижается при ответах 429, 5xx, ошибках соединения и высокой задержке.
+	"""
+
+	#==========================================================================================#
+	# >>>>> ПАРАМЕТРЫ АЛГОРИТМА <<<<< #
+	#==========================================================================================#
+
+	INCREASE_FACTOR = 0.05
+	DECREASE_FACTOR = 0.5
+	SLOWDOWN_FACTOR = 0.9
+	LATENCY_TARGET = 3.0
+
+	#==========================================================================================#
+	# >>>>> СВОЙСТВА <<<<< #
+	#==========================================================================================#
+
+	@property
+	def statistics(self) -> RateStatistics:
+		"""Статистика контроллера частоты запросов."""
+
+		with self.__Lock:
+			Elapsed = self.__LastRequest - self.__FirstRequest if self.__Requests > 1 else 0.0
+			EffectiveRate = (self.__Requests - 1) / Elapsed if Elapsed else 0.0
+
+			return RateStatistics(self.__Requests, self.__Backoffs, EffectiveRate, self.__Rate)
+
+	#==========================================================================================#
+	# >>>>> ПРИВАТНЫЕ МЕТОДЫ <<<<< #
+	#==========================================================================================#
+
+	def __Pause(self, duration: float):
+		"""
+		Приостанавливает выпуск запросов. Вызывается под блокировкой.
+
+		:param duration: Длительность паузы (в секундах).
+		:type duration: float
+		"""
+
+		self.__PausedUntil = max(self.__PausedUntil, monotonic() + duration)
+		self.__Tokens = 0.0
+		self.__Updated = self.__PausedUntil
+
+	#==========================================================================================#
+	# >>>>> ПУБЛИЧНЫЕ МЕТОДЫ <<<<< #
+	#==========================================================================================#
+
+	def __init__(self, rate: float, max_rate: float):
+		"""
+		Потокобезопасный адаптивный контроллер частоты запросов к источнику.
+
+		:param rate: Начальная частота (запросов в секунду).
+		:type rate: float
+		:param max_rate: Максимальная частота (запросов в секунду).
+		:type max_rate: float
+		"""
+
+		self.__BaseRate = rate
+		self.__Rate = rate
+		self.__MaxRate = max(max_rate, rate)
+		self.__MinRate = rate / 16
+		self.__Lock = Lock()
+
+		self.__Tokens = 1.0
+		self.__Updated = monotonic()
+		self.__PausedUntil = 0.0
+
+		self.__Requests = 0
+		self.__Backoffs = 0
+		self.__FirstRequest = 0.0
+		self.__LastRequest = 0.0
+
+	def acquire(self):
+		"""Блокирует поток до получения разрешения на отправку запроса."""
+
+		while True:
+
+			with self.__Lock:
+				Now = monotonic()
+
+				if Now >= self.__PausedUntil:
+					self.__Tokens = min(1.0, self.__Tokens + (Now - self.__Updated) * self.__Rate)
+					self.__Updated = Now
+
+					if self.__Tokens >= 1.0:
+						self.__Tokens -= 1.0
+						if not self.__Requests: self.__FirstRequest = Now
+						self.__Requests += 1
+						self.__LastRequest = Now
+						return
+
+					Delay = (1.0 - self.__Tokens) / self.__Rate
+
+				else: Delay = self.__PausedUntil - Now
+
+			sleep(Delay)
+
+	def report(self, status_code: int | None, latency: float, retry_after: float | None = None):
+		"""
+		Корректирует частоту по результату запроса.
+
+		:param status_code: Код ответа или `None` при ошибке соединения.
+		:type status_code: int | None
+		:param latency: Время выполнения запроса (в секундах).
+		:type latency: float
+		:param retry_after: Рекомендованная сервером пауза (в секундах).
+		:type retry_after: float | None
+		"""
+
+		with self.__Lock:
+
+			if status_code is None or status_code == 429 or status_code >= 500:
+				self.__Rate = max(self.__MinRate, self.__Rate * self.DECREASE_FACTOR)
+				self.__Backoffs += 1
+				if retry_after: self.__Pause(retry_after)
+
+			elif latency > self.LATENCY_TARGET: self.__Rate = max(self.__MinRate, self.__Rate * self.SLOWDOWN_FACTOR)
+			else: self.__Rate = min(self.__MaxRate, self.__Rate + self.__BaseRate * self.INCREASE_FACTOR)
+
+	def request(self, method: Callable[..., Any], *args, **kwargs) -> Any:
+		"""
+		Выполняет запрос с ожиданием разрешения и учётом его результата.
+
+		Собственные повторы оператора запросов выполняются внутри одного вызова метода, поэтому учитываются как один запрос с итоговым кодом ответа. Исключение, выброшенное методом запроса, учитывается как ошибка соединения и передаётся дальше.
+
+		:param method: Метод запроса оператора, возвращающий объект с атрибутами `status_code` и `headers`.
+		:type method: Callable[..., Any]
+		:return: Ответ сервера.
+		:rtype: Any
+		"""
+
+		self.acquire()
+		Start = monotonic()
+
+		try: Response = method(*args, **kwargs)
+
+		except Exception:
+			self.report(None, monotonic() - Start)
+			raise
+
+		RetryAfter = (Response.headers or dict()).get("retry-after")
+		RetryAfter = float(RetryAfter) if RetryAfter and RetryAfter.isdigit() else None
+		self.report(Response.status_code, monotonic() - Start, RetryAfter)
+
+		return Response
+
+_Controllers: dict[str, RateController] = dict()
+_ControllersLock = Lock()
+
+def GetRateController(site: str, delay: float, max_rate: float | None = None) -> RateController:
+	"""
+	Возвращает общий для процесса контроллер частоты запросов к сайту.
+
+	:param site: Домен источника.
+	:type site: str
+	:param delay: Интервал между запросами (в секундах), определяющий начальную частоту.
+	:type delay: float
+	:param max_rate: Максимальная частота (запросов в секунду). По умолчанию равна начальной.
+	:type max_rate: float | None
+	:return: Контроллер частоты запросов.
+	:rtype: RateController
+	"""
+
+	with _ControllersLock:
+
+		if site not in _Controllers:
+			Rate = 1 / delay if delay and delay > 0 else float(max_rate or 100)
+			_Controllers[site] = RateController(Rate, float(max_rate or Rate))
+
+		return _Controllers[site]
+
+_SharedRequestor: Any = None
+
+def GetSharedRequestor() -> Any:
+	"""
+	Возвращает общий для процесса оператор запросов, зарегистрированный функцией `SetSharedRequestor()`.
+
+	:return: Общий оператор запросов или `None`, если тот не зарегистрирован.
+	:rtype: WebRequestor | None
+	"""
+
+	with _ControllersLock: return _SharedRequestor
+
+def SetSharedRequestor(requestor: Any) -> Any:
+	"""
+	Регистрирует общий для процесса оператор запросов, который парсеры используют для собственных запросов вместо операторов Melon. Операторы Melon и их настройки не изменяются.
+
+	Оператор создаётся и закрывается вызывающим кодом.
+
+	:param requestor: Оператор запросов или `None` для снятия регистрации.
+	:type requestor: WebRequestor | None
+	:return: Ранее зарегистрированный оператор запросов.
+	:rtype: WebRequestor | None
+	"""
+
+	global _SharedRequestor
+
+	with _ControllersLock:
+		Previous = _SharedRequestor
+		_SharedRequestor = requestor
+
+	return Previous
+
+#==========================================================================================#
+# >>>>> ПРЕДВАРИТЕЛЬНАЯ ЗАГРУЗКА ГЛАВ <<<<< #
+#==========================================================================================#
+
+class ChaptersPrefetcher:
+	"""Загружает страницы следующих глав ветви в пуле потоков, сохраняя порядок выдачи."""
+
+	def __init__(self, loader: Callable[[Any], Any], workers: int, window: int | None = None, deferred: Callable[[Any], bool] | None = None):
+		"""
+		Загружает страницы следующих глав ветви в пуле потоков, сохраняя порядок выдачи.
+
+		:param loader: Функция загрузки страницы главы, принимающая объект главы.
+		:type loader: Callable[[Any], Any]
+		:param workers: Количество потоков загрузки. При значении меньше двух загрузка выполняется в вызывающем потоке.
+		:type workers: int
+		:param window: Количество следующих глав, загружаемых заранее. По умолчанию вдвое больше количества потоков.
+		:type window: int | None
+		:param deferred: Функция, определяющая главы, которые не загружаются заранее, а только при запросе их страницы.
+		:type deferred: Callable[[Any], bool] | None
+		"""
+
+		self.__Loader = loader
+		self.__Deferred = deferred
+		self.__Workers = max(int(workers or 1), 1)
+		self.__Window = max(int(window or 0), self.__Workers * 2)
+
+		self.__Executor: ThreadPoolExecutor | None = None
+		self.__Futures: dict[int, Future] = dict()
+		self.__BranchID = None
+		self.__Positions: dict[int, int] = dict()
+
+	def __Submit(self, chapters: Iterable[Any]):
+		"""
+		Ставит главы в очередь загрузки.
+
+		:param chapters: Последовательность глав.
+		:type chapters: Iterable[Any]
+		"""
+
+		if not self.__Executor: self.__Executor = ThreadPoolExecutor(self.__Workers, "ranobehub-amend")
+
+		for CurrentChapter in chapters:
+			if CurrentChapter.id in self.__Futures or CurrentChapter.paragraphs: continue
+			if self.__Deferred and self.__Deferred(CurrentChapter): continue
+			self.__Futures[CurrentChapter.id] = self.__Executor.submit(self.__Loader, CurrentChapter)
+
+	def __Reset(self, branch: Any):
+		"""
+		Переключает загрузчик на новую ветвь, отменяя ожидающие задачи предыдущей.
+
+		:param branch: Данные ветви.
+		:type branch: Any
+		"""
+
+		for CurrentFuture in self.__Futures.values(): CurrentFuture.cancel()
+		self.__Futures = dict()
+		self.__BranchID = branch.id
+		self.__Positions = {CurrentChapter.id: Index for Index, CurrentChapter in enumerate(branch.chapters)}
+
+	def close(self):
+		"""Завершает работу пула потоков."""
+
+		if self.__Executor:
+			for CurrentFuture in self.__Futures.values(): CurrentFuture.cancel()
+			self.__Executor.shutdown(wait = True)
+			self.__Executor = None
+
+		self.__Futures = dict()
+
+	def get(self, branch: Any, chapter: Any) -> Any:
+		"""
+		Возвращает результат загрузки страницы главы, предварительно поставив в очередь следующие главы ветви.
+
+		:param branch: Данные ветви.
+		:type branch: Any
+		:param chapter: Данные главы.
+		:type chapter: Any
+		:return: Результат функции загрузки.
+		:rtype: Any
+		"""
+
+		if self.__Workers < 2: return self.__Loader(chapter)
+		if branch.id != self.__BranchID or chapter.id not in self.__Positions: self.__Reset(branch)
+
+		Position = self.__Positions[chapter.id]
+		CurrentFuture = self.__Futures.pop(chapter.id, None)
+
+		# Отмена загрузки пропущенных глав.
+		for ChapterID in tuple(self.__Futures.keys()):
+			if self.__Positions.get(ChapterID, -1) < Position: self.__Futures.pop(ChapterID).cancel()
+
+		self.__Submit(branch.chapters[Position + 1:Position + 1 + self.__Window])
+
+		return CurrentFuture.result() if CurrentFuture else self.__Loader(chapter)
@@ -1,15 +1,20 @@
 from Source.Core.Base.Formats.Ranobe.Elements import Blockquote, Footnote, Header, Image, Paragraph
 from Source.Core.Base.Parsers.Components.ChapterHeaderParser.Ranobe import ChapterHeaderParser
-from Source.Core.Base.Formats.BaseFormat import Cover, Statuses
+from Source.Core.Base.Formats.BaseFormat import Cover
 from Source.Core.Base.Parsers.RanobeParser import RanobeParser
 from Source.Core.Base.Formats.Ranobe import Branch, Chapter
-from Source.Core.Base.Parsers.Components import Functions
 
-from dublib.Polyglot import HTML
+from .storage import AmendCheckpoint, CatalogIndex, ChaptersStore, ContentHashes, UpdatesJournal
+from .network import ChaptersPrefetcher, GetRateController, GetSharedRequestor
+from .extractor import ChapterContent, CreateTag, DumpContent, ElementData, ExtractChapter, FindGroupContainer, GetParsingPool, LoadContent, ParseChapterPage
+from .instrumentation import Profiler
+from .metadata import ExtractMetadata, TitleMetadata
+from .cache import ResponsesCache
 
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
 
-from bs4 import BeautifulSoup, Tag
+import os
 
 @dataclass(frozen = True)
 class FootnotesSearchResult:
@@ -19,198 +24,419 @@ class FootnotesSearchResult:
 class Parser(RanobeParser):
 	"""Парсер."""
 
+	#==========================================================================================#
+	# >>>>> ПЕРЕОПРЕДЕЛЯЕМЫЕ МЕТОДЫ <<<<< #
+	#==========================================================================================#
+
+	def _PostInitMethod(self):
+		"""Метод, выполняющийся после инициализации объекта."""
+
+		self.__Profiler = Profiler(self._Settings.custom.get("instrumentation", False))
+		self.__Requestor = GetSharedRequestor() or self._Requestor
+		self.__RateController = GetRateController(self._Manifest.site, self._Settings.common.delay, self._Settings.custom.get("max_rate"))
+		ParseWorkers = self._Settings.custom.get("parse_workers", 1)
+		AmendWorkers = self._Settings.custom.get("amend_workers", 1)
+		self.__ParsingPool: ProcessPoolExecutor | None = GetParsingPool(ParseWorkers) if ParseWorkers > 1 else None
+
+		# В конвейерном режиме потоки только загружают страницы, а для загрузки процессов разбора заранее запрашивается больше глав.
+		if self.__ParsingPool: self.__Prefetcher = ChaptersPrefetcher(self.__SubmitChapterPage, max(AmendWorkers, 2), ParseWorkers * 2, self.__IsChapterDeferred)
+		else: self.__Prefetcher = ChaptersPrefetcher(self.__LoadChapterPage, AmendWorkers, deferred = self.__IsChapterDeferred)
+
+		self.__Store: ChaptersStore | None = None
+		self.__UpdatedChapters: dict[str, int] | None = None
+		self.__ReusedChapters = 0
+		self.__Checkpoint: AmendCheckpoint | None = None
+		self.__ResumedChapters = 0
+		self.__Hashes: ContentHashes | None = None
+		self.__Cache: ResponsesCache | None = None
+		self.__SlugsIndex: dict[str, list[Chapter]] = dict()
+		self.__DeferredChapters: set[int] = set()
+		self.__RedirectingChapters: set[int] = set()
+		self.__RedirectedContents: dict[int, ChapterContent] = dict()
+
 	#==========================================================================================#
 	# >>>>> ПРИВАТНЫЕ МЕТОДЫ <<<<< #
 	#==========================================================================================#
 
-	def __FindFilledChapter(self, chapters: tuple[Chapter], slug: str) -> Chapter | None:
+	def __DetectSharedPages(self):
+		"""
+		Определяет главы с общей страницей по индексу алиасов.
+
+		Главы разных томов с общим алиасом ведут на одну страницу, содержащую контент только одной из них. Страница загружается для первой главы группы, а остальные главы не загружаются заранее, пока владелец контента не определён по самой странице.
+		"""
+
+		for Chapters in self.__SlugsIndex.values():
+			for CurrentChapter in Chapters[1:]: self.__DeferredChapters.add(CurrentChapter.id)
+
+	def __ExtractChapterContent(self, branch: Branch, chapter: Chapter) -> ChapterContent | None:
+		"""
+		Загружает страницу главы и извлекает её содержимое.
+
+		Если страница общая и содержит контент другой главы группы, он передаётся этой главе, а текущая глава становится перенаправляющей.
+
+		:param branch: Данные ветви.
+		:type branch: Branch
+		:param chapter: Данные главы.
+		:type chapter: Chapter
+		:return: Содержимое главы или `None` при ошибке запроса, отсутствии контейнера либо перенаправлении.
+		:rtype: ChapterContent | None
 		"""
-		Находит в последовательности первую главу с указанным алиасом и имеющую контент.
 
-		:param chapters: Последовательность глав.
-		:type chapters: tuple[Chapter]
-		:param slug: Алиас главы.
-		:type slug: str
+		if chapter.id in self.__RedirectedContents: return self.__RedirectedContents.pop(chapter.id)
+		IsReused = self.__IsChapterReusable(chapter)
+		with self.__Profiler.stage("wait"): Page = self.__Prefetcher.get(branch, chapter)
+
+		if Page is None:
+			self.__ResolveSharedPage(chapter, None)
+			return
+
+		if self.__ParsingPool:
+			with self.__Profiler.stage("pool"): Parsed = Page.result()
+
+			if not Parsed:
+				self.__ResolveSharedPage(chapter, None)
+				self._Portals.chapter_not_found(chapter)
+				return
+
+			OwnerID, ContainerHTML, SerializedContent = Parsed
+			Content = LoadContent(SerializedContent)
+
+		else:
+			with self.__Profiler.stage("lxml"): Extracted = FindGroupContainer(Page, self.__GetPageChapters(chapter))
+
+			if not Extracted:
+				self.__ResolveSharedPage(chapter, None)
+				self._Portals.chapter_not_found(chapter)
+				return
+
+			OwnerID, Soup, Container = Extracted
+			ContainerHTML = str(Container) if self.__Store and not IsReused else None
+			with self.__Profiler.stage("extract"): Content = ExtractChapter(Soup, Container, self.__Profiler)
+
+		if IsReused: self.__ReusedChapters += 1
+		elif ContainerHTML: self.__Store.put(OwnerID, ContainerHTML)
+		self.__ResolveSharedPage(chapter, OwnerID)
+		if OwnerID == chapter.id: return Content
+		self.__RedirectedContents[OwnerID] = Content
+
+	def __FindFilledChapter(self, chapter: Chapter) -> Chapter | None:
+		"""
+		Находит другую главу с тем же алиасом, имеющую контент.
+
+		:param chapter: Данные главы.
+		:type chapter: Chapter
 		:return: Данные главы или `None` при отсутствии подходящей.
 		:rtype: Chapter | None
 		"""
 
-		for CurrentChapter in chapters:
-			if CurrentChapter.slug == slug: return CurrentChapter
+		for CurrentChapter in self.__SlugsIndex.get(chapter.slug, tuple()):
+			if CurrentChapter.id != chapter.id and CurrentChapter.paragraphs: return CurrentChapter
 
-	def __FindFootnotesByAnchors(self, tag: Tag, text: str, footnotes_dict: dict[str, Footnote]) -> FootnotesSearchResult:
+	def __FindFootnotesByAnchors(self, data: ElementData, footnotes_dict: dict[str, Footnote]) -> FootnotesSearchResult:
 		"""
-		Ищет ссылки на заметки и на их основе создаёт объекты `Footnote`.
+		Заменяет ссылки на заметки в тексте элемента и собирает соответствующие им объекты `Footnote`.
+
+		Текст собирается за один проход по сегментам: замена выполняется только в коде самой ссылки.
 
-		:param tag: Обрабатываемый тег.
-		:type tag: Tag
-		:param text: Текст элемента.
-		:type text: str
-		:param footnotes_dict: Словарь из контента заметок главы, полученный при помощи метода `__GetFootnotes()`.
+		:param data: Описание элемента.
+		:type data: ElementData
+		:param footnotes_dict: Словарь заметок главы, полученный при помощи метода `__GetFootnotes()`.
 		:type footnotes_dict: dict[str, Footnote]
-		:return: _description_
-		:rtype: list[Footnote]
+		:return: Текст элемента и список заметок.
+		:rtype: FootnotesSearchResult
 		"""
 
+		TextParts = list()
 		Footnotes = list()
 
-		for Anchor in tag.find_all("a"):
+		for Segment in data.segments:
 
-			Href = Anchor.get("href")
-			if not Href or not Href.startswith("#"):
-				Anchor.decompose()
+			if type(Segment) == str:
+				TextParts.append(Segment)
 				continue
-			
-			FootnoteID = Href[1:]
-			FootnoteObject = footnotes_dict[FootnoteID]
-			FootnoteObject.set_placeholder(Anchor.get_text().strip())
-			text = FootnoteObject.replace_in_text(text, str(Anchor))
+
+			FootnoteObject = footnotes_dict.get(Segment.id)
+
+			if not FootnoteObject:
+				TextParts.append(Segment.html)
+				continue
+
+			FootnoteObject.set_placeholder(Segment.placeholder)
+			TextParts.append(FootnoteObject.replace_in_text(Segment.html, Segment.html))
 			Footnotes.append(FootnoteObject)
 
-		return FootnotesSearchResult(text, Footnotes)
+		return FootnotesSearchResult("".join(TextParts), Footnotes)
 
-	def __GetFootnotes(self, container: Tag) -> dict[str, Footnote]:
+	def __GetChapterUpdateTime(self, chapter: Chapter) -> int:
 		"""
-		Возвращает словарь заметок.
+		Возвращает время последнего обновления главы по журналу обновлений.
 
-		:param container: Контейнер контента главы.
-		:type container: Tag
-		:return: Словарь, в котором ключ – ID заметки на сайте, а значение – сама заметка.
-		:rtype: dict[str, Footnote]
+		:param chapter: Данные главы.
+		:type chapter: Chapter
+		:return: Время обновления в формате UNIX или 0, если глава не обновлялась.
+		:rtype: int
 		"""
 
-		FootnotesDict = dict()
-		ReferencesList: list[Tag] = list()
+		return max(self.__UpdatedChapters.get(chapter.slug, 0), self.__UpdatedChapters.get(str(chapter.id), 0))
 
-		#---> В некоторых главах несколько списков сновок.
-		#==========================================================================================#
-		References = container.find_all("ol")
-		if not References: return FootnotesDict
+	def __GetPageChapters(self, chapter: Chapter) -> tuple[int]:
+		"""
+		Возвращает ID глав, контент которых может находиться на странице главы.
 
-		for Reference in References:
-			Buffer = Reference.find_all("li")
+		:param chapter: Данные главы.
+		:type chapter: Chapter
+		:return: ID самой главы, а за ним ID остальных глав с тем же алиасом.
+		:rtype: tuple[int]
+		"""
 
-			if Buffer: 
-				for CurrentBufferElement in Buffer: ReferencesList.append(CurrentBufferElement)
+		return (chapter.id, *(CurrentChapter.id for CurrentChapter in self.__SlugsIndex.get(chapter.slug, tuple()) if CurrentChapter.id != chapter.id))
 
-		#---> Получение содержимого заметки для каждого элемента списка.
-		#==========================================================================================#
-		for Reference in ReferencesList:
-			ReferenceID = Reference.attrs.get("id")
-			if not ReferenceID: self._Portals.warning("Reference hasn't ID. Skipped.")
-			Reference.find("a").decompose()
+	def __GetFootnotes(self, footnotes: dict[str, str]) -> dict[str, Footnote]:
+		"""
+		Возвращает словарь заметок.
 
+		:param footnotes: Словарь текстов заметок главы.
+		:type footnotes: dict[str, str]
+		:return: Словарь, в котором ключ – ID заметки на сайте, а значение – сама заметка.
+		:rtype: dict[str, Footnote]
+		"""
+
+		FootnotesDict = dict()
+
+		for ReferenceID, Text in footnotes.items():
 			ParagraphObject = Paragraph(self._SystemObjects)
-			ParagraphObject.set_text(Reference.get_text())
+			ParagraphObject.set_text(Text)
 			FootnoteObject = Footnote(self._SystemObjects)
 			FootnoteObject.add_element(ParagraphObject)
 			FootnotesDict[ReferenceID] = FootnoteObject
 
 		return FootnotesDict
 
+	def __IsChapterCheckpointed(self, chapter: Chapter) -> bool:
+		"""
+		Проверяет, завершена ли глава в контрольной точке прерванного запуска и не изменилась ли она с тех пор.
+
+		:param chapter: Данные главы.
+		:type chapter: Chapter
+		:return: Состояние: можно ли восстановить главу из контрольной точки.
+		:rtype: bool
+		"""
+
+		if not self.__Checkpoint: return False
+		Record = self.__Checkpoint.chapters.get(chapter.id)
+		if not Record or Record[0] != chapter.slug: return False
+		if self.__UpdatedChapters is None: return True
+
+		return self.__GetChapterUpdateTime(chapter) < Record[1]
+
+	def __IsChapterDeferred(self, chapter: Chapter) -> bool:
+		"""
+		Проверяет, откладывается ли загрузка страницы главы до её дополнения.
+
+		:param chapter: Данные главы.
+		:type chapter: Chapter
+		:return: Состояние: является ли глава неопределённой главой общей страницы или перенаправляющей.
+		:rtype: bool
+		"""
+
+		return chapter.id in self.__DeferredChapters or chapter.id in self.__RedirectingChapters
+
+	def __IsChapterReusable(self, chapter: Chapter) -> bool:
+		"""
+		Проверяет, можно ли использовать сохранённый ранее контент главы вместо повторной загрузки.
+
+		Контент используется повторно только для тайтлов, записи которых появились в журнале обновлений после их предыдущей обработки, если глава не обновлялась после сохранения.
+
+		:param chapter: Данные главы.
+		:type chapter: Chapter
+		:return: Состояние: можно ли использовать сохранённый контент.
+		:rtype: bool
+		"""
+
+		if not self.__Store or self.__UpdatedChapters is None: return False
+		StoredAt = self.__Store.timestamps.get(chapter.id)
+		if StoredAt is None: return False
+
+		return self.__GetChapterUpdateTime(chapter) < StoredAt
+
+	def __LoadChapterPage(self, chapter: Chapter) -> str | None:
+		"""
+		Загружает страницу главы.
+
+		:param chapter: Данные главы.
+		:type chapter: Chapter
+		:return: Код HTML страницы или сохранённого контейнера главы либо `None` при ошибке запроса.
+		:rtype: str | None
+		"""
+
+		if chapter.id in self.__RedirectingChapters or self.__IsChapterCheckpointed(chapter): return
+		if self.__IsChapterReusable(chapter): Page = self.__Store.get(chapter.id)
+
+		else:
+			Response = self.__Request(f"https://{self._Manifest.site}/ranobe/{chapter.slug}")
+
+			if not Response.ok:
+				self._Portals.request_error(Response, "Unable load chapter page.")
+				return
+
+			Page = Response.text
+
+		return Page
+
+	def __Request(self, url: str):
+		"""
+		Выполняет запрос GET через общий контроллер частоты запросов и кэш ответов, если тот включён.
+
+		:param url: Адрес запроса.
+		:type url: str
+		:return: Ответ сервера.
+		:rtype: WebResponse | CachedResponse
+		"""
+
+		def Requester(headers: dict[str, str]):
+			with self.__Profiler.stage("network"): Response = self.__RateController.request(self.__Requestor.get, url, headers = headers or None)
+			self.__Profiler.count("requests")
+			self.__Profiler.count("bytes_downloaded", len(Response.content or b""))
+
+			return Response
+
+		if self.__Cache: return self.__Cache.get(url, Requester)
+
+		return Requester(dict())
+
+	def __ResolveSharedPage(self, chapter: Chapter, owner_id: int | None):
+		"""
+		Определяет владельца контента общей страницы глав. Остальные главы группы отмечаются перенаправляющими и не загружаются.
+
+		:param chapter: Данные главы, для которой загружена страница.
+		:type chapter: Chapter
+		:param owner_id: ID главы, контейнер которой найден на странице, или `None`, если страницу не удалось получить или разобрать. В этом случае главы группы загружаются по отдельности.
+		:type owner_id: int | None
+		"""
+
+		Chapters = self.__SlugsIndex.get(chapter.slug, tuple())
+		if len(Chapters) < 2: return
+
+		for CurrentChapter in Chapters:
+			self.__DeferredChapters.discard(CurrentChapter.id)
+			if owner_id is not None and CurrentChapter.id != owner_id: self.__RedirectingChapters.add(CurrentChapter.id)
+
+	def __SubmitChapterPage(self, chapter: Chapter) -> Future | None:
+		"""
+		Загружает страницу главы и передаёт её на разбор в пул процессов.
+
+		:param chapter: Данные главы.
+		:type chapter: Chapter
+		:return: Задача разбора, возвращающая результат функции `ParseChapterPage()`, либо `None` при ошибке запроса.
+		:rtype: Future | None
+		"""
+
+		Page = self.__LoadChapterPage(chapter)
+		if Page is None: return
+		KeepContainer = bool(self.__Store) and not self.__IsChapterReusable(chapter)
+
+		return self.__ParsingPool.submit(ParseChapterPage, Page, self.__GetPageChapters(chapter), KeepContainer)
+
 	#==========================================================================================#
 	# >>>>> ПРИВАТНЫЕ МЕТОДЫ СОЗДАНИЯ ЭЛЕМЕНТОВ ГЛАВ <<<<< #
 	#==========================================================================================#
 
-	def __CreateBlockquoteElementFromTag(self, tag: Tag, chapter: Chapter, footnotes_dict: dict[str, Footnote]) -> Blockquote:
+	def __AddElements(self, chapter: Chapter, content: ChapterContent):
 		"""
-		Создаёт элемент `Blockquote` из тега блока текста.
+		Создаёт элементы главы по её содержимому.
 
-		:param tag: Тег блока текста.
-		:type tag: Tag
 		:param chapter: Данные главы.
 		:type chapter: Chapter
-		:param footnotes_dict: Словарь из контента заметок главы, полученный при помощи метода `__GetFootnotes()`.
-		:type footnotes_dict: dict[str, Footnote]
-		:return: Элемент страницы.
-		:rtype:Blockquotee
+		:param content: Содержимое главы.
+		:type content: ChapterContent
 		"""
 
-		BlockquoteObject = Blockquote()
+		FootnotesDict = self.__GetFootnotes(content.footnotes)
+		for Data in content.elements: chapter.add_element(self.__CreateElement(Data, chapter, FootnotesDict))
+		if self.__Hashes and self.__Hashes.update(chapter.id, DumpContent(content)): self.__Profiler.count("chapters_changed")
 
-		for CurrentTag in tag.find_all(("p", "img"), recursive = False):
-			Element = None
+	def __CreateBlockquoteElement(self, data: ElementData, chapter: Chapter, footnotes_dict: dict[str, Footnote]) -> Blockquote:
+		"""
+		Создаёт элемент `Blockquote` из описания блока текста.
 
-			match CurrentTag.name:
-				case "p": Element = self.__CreateParagraphElementFromTag(CurrentTag, footnotes_dict)
-				case "img": Element = self.__CreateImageElementFromTag(CurrentTag, chapter)
+		:param data: Описание блока текста.
+		:type data: ElementData
+		:param chapter: Данные главы.
+		:type chapter: Chapter
+		:param footnotes_dict: Словарь заметок главы, полученный при помощи метода `__GetFootnotes()`.
+		:type footnotes_dict: dict[str, Footnote]
+		:return: Элемент страницы.
+		:rtype: Blockquote
+		"""
 
-			BlockquoteObject.add_element(Element)
+		BlockquoteObject = Blockquote()
+		for Child in data.children: BlockquoteObject.add_element(self.__CreateElement(Child, chapter, footnotes_dict))
 		
 		return BlockquoteObject
 
-	def __CreateHeaderElementFromTag(self, tag: Tag, footnotes_dict: dict[str, Footnote]) -> Header | None:
+	def __CreateElement(self, data: ElementData, chapter: Chapter, footnotes_dict: dict[str, Footnote]) -> Blockquote | Header | Image | Paragraph:
 		"""
-		Создаёт элемент `Header` из тега заголовка.
+		Создаёт элемент главы по его описанию.
 
-		:param tag: Тег заголовка.
-		:type tag: Tag
-		:param footnotes_dict: Словарь из контента заметок главы, полученный при помощи метода `__GetFootnotes()`.
+		:param data: Описание элемента.
+		:type data: ElementData
+		:param chapter: Данные главы.
+		:type chapter: Chapter
+		:param footnotes_dict: Словарь заметок главы, полученный при помощи метода `__GetFootnotes()`.
 		:type footnotes_dict: dict[str, Footnote]
-		:return: Элемент страницы или `None` в случае игнорирования абзаца.
-		:rtype: Image
+		:return: Элемент страницы.
+		:rtype: Blockquote | Header | Image | Paragraph
 		"""
 
-		HeaderObject = Header(self._SystemObjects)
-		Text = tag.decode_contents().strip()
-		Footnotes = list()
-		if not Text: return
-
-		SearchResult = self.__FindFootnotesByAnchors(tag, Text, footnotes_dict)
-		Text = SearchResult.text
-		Footnotes += SearchResult.footnotes
+		self.__Profiler.count("elements_created")
 
-		HeaderObject.set_text(Text)
-		for Note in Footnotes: HeaderObject.add_footnote(Note)
-		HeaderObject.parse_align(tag)
-		
-		return HeaderObject
+		match data.type:
+			case "blockquote": return self.__CreateBlockquoteElement(data, chapter, footnotes_dict)
+			case "header": return self.__CreateTextElement(Header(self._SystemObjects), "h3", data, footnotes_dict)
+			case "image": return self.__CreateImageElement(data, chapter)
+			case "paragraph": return self.__CreateTextElement(Paragraph(self._SystemObjects), "p", data, footnotes_dict)
 
-	def __CreateImageElementFromTag(self, tag: Tag, chapter: Chapter) -> Image:
+	def __CreateImageElement(self, data: ElementData, chapter: Chapter) -> Image:
 		"""
-		Создаёт элемент `Image` из тега изображения.
+		Создаёт элемент `Image` из описания изображения.
 
-		:param tag: Тег изображения.
-		:type tag: Tag
+		:param data: Описание изображения.
+		:type data: ElementData
 		:param chapter: Данные главы.
 		:type chapter: Chapter
 		:return: Элемент страницы.
 		:rtype: Image
 		"""
 
-		tag.attrs["src"] = f"https://{self._Manifest.site}/api/media/" + tag.attrs["data-media-id"]
+		Attributes = dict(data.attrs)
+		Attributes["src"] = f"https://{self._Manifest.site}/api/media/" + Attributes["data-media-id"]
 		ImageObject = Image(self._SystemObjects, self, chapter)
-		ImageObject.parse_image(tag)
+		ImageObject.parse_image(CreateTag("img", Attributes))
 		
 		return ImageObject
 	
-	def __CreateParagraphElementFromTag(self, tag: Tag, footnotes_dict: dict[str, Footnote]) -> Paragraph | None:
+	def __CreateTextElement(self, element: Header | Paragraph, tag_name: str, data: ElementData, footnotes_dict: dict[str, Footnote]) -> Header | Paragraph:
 		"""
-		Создаёт элемент `Paragraph` из тега абзаца.
-
-		:param tag: Тег абзаца.
-		:type tag: Tag
-		:param footnotes_dict: Словарь из контента заметок главы, полученный при помощи метода `__GetFootnotes()`.
+		Заполняет текстовый элемент по его описанию.
+
+		:param element: Пустой элемент `Header` или `Paragraph`.
+		:type element: Header | Paragraph
+		:param tag_name: Название исходного тега, используемое для определения выравнивания.
+		:type tag_name: str
+		:param data: Описание элемента.
+		:type data: ElementData
+		:param footnotes_dict: Словарь заметок главы, полученный при помощи метода `__GetFootnotes()`.
 		:type footnotes_dict: dict[str, Footnote]
-		:return: Элемент страницы или `None` в случае игнорирования абзаца.
-		:rtype: Image
+		:return: Элемент страницы.
+		:rtype: Header | Paragraph
 		"""
 
-		ParagraphObject = Paragraph(self._SystemObjects)
-		for Break in tag.find_all("br"): Break.decompose()
-		Text = tag.decode_contents().strip()
-		Footnotes = list()
-		if not Text: return
-
-		SearchResult = self.__FindFootnotesByAnchors(tag, Text, footnotes_dict)
-		Text = SearchResult.text
-		Footnotes += SearchResult.footnotes
+		SearchResult = self.__FindFootnotesByAnchors(data, footnotes_dict)
+		element.set_text(SearchResult.text)
+		for Note in SearchResult.footnotes: element.add_footnote(Note)
+		element.parse_align(CreateTag(tag_name, data.attrs))
 		
-		ParagraphObject.set_text(Text)
-		for Note in Footnotes: ParagraphObject.add_footnote(Note)
-		ParagraphObject.parse_align(tag)
-		
-		return ParagraphObject
+		return element
 
 	#==========================================================================================#
 	# >>>>> ПРИВАТНЫЕ МЕТОДЫ ПАРСИНГА СТРАНИЦЫ ТАЙТЛА <<<<< #
@@ -219,12 +445,18 @@ class Parser(RanobeParser):
 	def __GetBranch(self):
 		"""Получает данные глав."""
 
-		Response = self._Requestor.get(f"https://{self._Manifest.site}/api/ranobe/{self._Title.id}/contents")
+		Response = self.__Request(f"https://{self._Manifest.site}/api/ranobe/{self._Title.id}/contents")
 		if not Response.ok: self._Portals.request_error(Response, "Unable to get branch data.")
 
 		CurrentBranch = Branch(self._Title.id)
+		self.__SlugsIndex = dict()
+		self.__DeferredChapters = set()
+		self.__RedirectingChapters = set()
+		self.__RedirectedContents = dict()
+
+		Data = Response.json
 
-		for Volume in Response.json["volumes"]:
+		for Volume in Data["volumes"]:
 
 			for ChapterData in Volume["chapters"]:
 				CurrentChapter = Chapter(self._SystemObjects, self._Title)
@@ -237,22 +469,28 @@ class Parser(RanobeParser):
 				CurrentChapter.set_type(HeaderData.type)
 				CurrentChapter.set_slug(ChapterData["url"].split("ranobe/")[-1])
 				CurrentBranch.add_chapter(CurrentChapter)
+				self.__SlugsIndex.setdefault(CurrentChapter.slug, list()).append(CurrentChapter)
 
+		self.__DetectSharedPages()
 		self._Title.add_branch(CurrentBranch)
 
-	def __GetCovers(self, data: dict):
+		if self._Settings.custom.get("catalog_index", False):
+			# Размер тайтла используется оператором при планировании обработки.
+			Index = CatalogIndex(self._Temper.parser_temp)
+			Index.set_chapters(self._Title.slug, self._Title.id, sum(len(Volume["chapters"]) for Volume in Data["volumes"]))
+			Index.close()
+
+	def __GetCovers(self, posters: dict[str, str]):
 		"""
 		Получает ссылки на обложки.
 
-		:param data: Словарь данных тайтла.
-		:type data: dict
+		:param posters: Словарь ссылок на обложки.
+		:type posters: dict[str, str]
 		"""
 
-		Posters: dict[str, str] = data["posters"]
-		del Posters["color"]
 		Covers = list()
 
-		for Link in Posters.values():
+		for Link in posters.values():
 
 			if Link.endswith("default.jpg"):
 				self._Portals.covers_unstubbed()
@@ -263,103 +501,73 @@ class Parser(RanobeParser):
 
 		self._Title.set_covers(Covers)
 
-	def __GetDescription(self, data: dict):
-		"""
-		Получает описание тайтла.
+	def __OpenChaptersStore(self):
+		"""Открывает хранилище глав тайтла и загружает записи журнала обновлений при включённом инкрементальном режиме."""
 
-		:param data: Словарь данных тайтла.
-		:type data: dict
-		"""
+		if self.__Store: self.__Store.close()
+		self.__Store = None
+		self.__UpdatedChapters = None
+		self.__ReusedChapters = 0
+		if not self._Settings.custom.get("incremental_updates", False): return
 
-		DescriptionParagraphs = BeautifulSoup(data["description"], "html.parser").find_all("p")
-		Description: list[str] = list()
+		self.__Store = ChaptersStore(os.path.join(self._Temper.parser_temp, "chapters"), self._Title.id)
+		Journal = UpdatesJournal(self._Temper.parser_temp)
+		self.__UpdatedChapters = Journal.get(self._Title.slug)
+		Journal.close()
 
-		for Paragraph in DescriptionParagraphs:
-			Paragraph = Paragraph.decode_contents()
-			Paragraph = HTML(Paragraph).plain_text.strip()
-			Description.append(Paragraph)
-
-		self._Title.set_description("\n".join(Description))
-
-	def __GetNames(self, soup: BeautifulSoup, data: dict):
-		"""
-		Парсит названия тайтла.
-
-		:param soup: Парсер HTML-секции данных тайтла.
-		:type soup: BeautifulSoup
-		:param data: Словарь данных тайтла.
-		:type data: dict
-		"""
-
-		self._Title.set_localized_name(data["names"]["rus"])
-		self._Title.set_eng_name(data["names"]["eng"])
-		
-		AnotherNames = soup.find("a", {"class": "ui header tiny grey"})
-
-		if AnotherNames:
-			AnotherNames = AnotherNames.get_text().split(" / ")
-			AnotherNames = tuple(Name.strip() for Name in AnotherNames)
-			self._Title.set_another_names(AnotherNames)
-
-	def __GetOriginalLanguage(self, soup: BeautifulSoup):
-		"""
-		Определяет код языка оригинального контента по стандарту ISO 639-1.
+	def __OpenContentHashes(self):
+		"""Загружает хэши контента глав тайтла, если включено определение изменившихся глав."""
 
-		:param soup: Парсер HTML-секции данных тайтла.
-		:type soup: BeautifulSoup
-		"""
+		self.__Hashes = None
+		if self._Settings.custom.get("content_hashes", False): self.__Hashes = ContentHashes(os.path.join(self._Temper.parser_temp, "hashes"), self._Title.id)
 
-		LanguagesDeterminations = {
-			"china": "zho",
-			"kr": "kor",
-			"japan": "jpn",
-			"us": "eng"
-		}
+	def __OpenCheckpoint(self):
+		"""Открывает контрольную точку дополнения тайтла, если включено продолжение прерванных запусков."""
 
-		Flag = soup.find("i")
+		if self.__Checkpoint: self.__Checkpoint.close()
+		self.__Checkpoint = None
+		self.__ResumedChapters = 0
+		if not self._Settings.custom.get("checkpoints", False): return
 
-		if Flag:
-			CountryCode = Flag.attrs["class"][0]
-			self._Title.set_original_language(LanguagesDeterminations[CountryCode])
+		self.__Checkpoint = AmendCheckpoint(os.path.join(self._Temper.parser_temp, "checkpoints"), self._Title.id)
+		if self.__Checkpoint.chapters: self._Portals.info(f"Resuming from checkpoint: {len(self.__Checkpoint.chapters)} chapters complete.")
 
-	def __GetStatus(self, data: dict):
-		"""
-		Определяет статус тайтла.
+	def __OpenResponsesCache(self):
+		"""Открывает кэш ответов сервера, если тот включён. Кэш закрывается в постобработке тайтла."""
 
-		:param data: Словарь данных тайтла.
-		:type data: dict
-		"""
+		if self.__Cache: self.__Cache.close()
+		self.__Cache = None
+		if not self._Settings.custom.get("http_cache", False): return
 
-		StatusesDeterminations = {
-			"В процессе": Statuses.ongoing,
-			"Заморожено": Statuses.dropped,
-			"Завершено": Statuses.completed
-		}
+		CachePath = os.path.join(self._Temper.parser_temp, "responses.sqlite")
+		CacheSize = self._Settings.custom.get("http_cache_size", 512) * 1024 ** 2
+		self.__Cache = ResponsesCache(CachePath, self._Settings.custom.get("http_cache_ttl", 0), CacheSize)
 
-		self._Title.set_status(StatusesDeterminations[data["status"]["title"]])
+		# Ответ 304 на условный запрос считается успешным, чтобы запросчик не повторял его.
+		GoodCodes = self.__Requestor.config.good_codes
+		if 304 not in GoodCodes: self.__Requestor.config.set_good_codes(GoodCodes + (304,))
 
-	def __GetTagsAngAgeLimit(self, data: dict):
+	def __SetMetadata(self, metadata: TitleMetadata):
 		"""
-		Получает теги тайтла и определяет возрастной рейтинг.
+		Заполняет описательные данные тайтла.
 
-		:param data: Словарь данных тайтла.
-		:type data: dict
+		:param metadata: Данные тайтла.
+		:type metadata: TitleMetadata
 		"""
 
-		Tags = list()
-		for Tag in data["tags"]["events"]: Tags.append(Tag["title"])
-		
-		Ratings = {
-			"18+": 18,
-			"R-15 (Японское возрастное ограничение)": 15
-		}
-
-		for Rating, AgeLimit in Ratings.items():
-			if Rating in Tags:
-				if self._Settings.common.pretty: Tags.remove(Rating)
-				self._Title.set_age_limit(AgeLimit)
-				break
-
+		self._Title.set_localized_name(metadata.localized_name)
+		self._Title.set_eng_name(metadata.eng_name)
+		if metadata.another_names: self._Title.set_another_names(metadata.another_names)
+		self.__GetCovers(metadata.posters)
+		for Author in metadata.authors: self._Title.add_author(Author)
+		self._Title.set_publication_year(metadata.publication_year)
+		self._Title.set_description(metadata.description)
+		if metadata.original_language: self._Title.set_original_language(metadata.original_language)
+		self._Title.set_status(metadata.status)
+		for Genre in metadata.genres: self._Title.add_genre(Genre)
+		Tags = list(metadata.tags)
+		if metadata.rating and self._Settings.common.pretty: Tags.remove(metadata.rating)
+		if metadata.age_limit: self._Title.set_age_limit(metadata.age_limit)
 		self._Title.set_tags(Tags)
 
 	#==========================================================================================#
@@ -376,75 +584,81 @@ class Parser(RanobeParser):
 		:type chapter: Chapter
 		"""
 		
-		Response = self._Requestor.get(f"https://{self._Manifest.site}/ranobe/{chapter.slug}")
-		if not Response.ok: self._Portals.request_error(Response, "Unable load chapter page.")
-		
-		Soup = BeautifulSoup(Response.text, "lxml")
-		Container: Tag = Soup.find("div", {"data-container": str(chapter.id)})
-
-		if not Container:
-			self._Portals.chapter_not_found(chapter)
-			return
-
-		# Удаление элементов интерфейса.
-		for Trash in Container.find_all("div"): Trash.decompose()
-
-		FootnotesDict = self.__GetFootnotes(Container)
-		for CurrentTag in Container.find_all(("p", "h3", "img", "blockquote"), recursive = False):
-			if CurrentTag.name == "p": CurrentTag = Functions.UnwrapInnerTags(CurrentTag)
-			Element = None
+		with self.__Profiler.stage("amend"):
+			if chapter.id in self.__RedirectingChapters: return
+			IsCheckpointed = self.__IsChapterCheckpointed(chapter)
 
-			match CurrentTag.name:
+			if IsCheckpointed:
+				self.__ResumedChapters += 1
+				self.__RedirectedContents.pop(chapter.id, None)
+				Content = LoadContent(self.__Checkpoint.get(chapter.id))
 
-				case "p":
-					for CurrentParagraph in Functions.SplitParagraph(Soup, CurrentTag):
-						Element = self.__CreateParagraphElementFromTag(CurrentParagraph, FootnotesDict)
+			else:
+				Content = self.__ExtractChapterContent(branch, chapter)
+				if not Content: return
+				if self.__Checkpoint: self.__Checkpoint.put(chapter.id, chapter.slug, DumpContent(Content))
 
-						if Element:
-							chapter.add_element(Element)
-							Element = None
+			with self.__Profiler.stage("elements"): self.__AddElements(chapter, Content)
 
-				case "h3": Element = self.__CreateHeaderElementFromTag(CurrentTag, FootnotesDict)
-				case "img": Element = self.__CreateImageElementFromTag(CurrentTag, chapter)
-				case "blockquote": Element = self.__CreateBlockquoteElementFromTag(CurrentTag, chapter, FootnotesDict)
-
-			if Element: chapter.add_element(Element)
+			self.__Profiler.count("chapters_amended")
 
 	def parse(self):
 		"""Получает основные данные тайтла."""
 
-		self._Title.set_id(int(self._Title.slug.split("-")[0]))
-		self._Title.set_content_language("rus")
-
-		Response = self._Requestor.get(f"https://ranobehub.org/api/ranobe/{self._Title.id}")
-		if not Response.ok: self._Portals.request_error(Response, "Unable request title data.")
-		Data = Response.json["data"]
-		Soup = BeautifulSoup(Data["html"], "html.parser")
-
-		self.__GetNames(Soup, Data)
-		self.__GetCovers(Data)
-		for AuthorData in Data["authors"]: self._Title.add_author(AuthorData["name_eng"])
-		self._Title.set_publication_year(Data["year"])
-		self.__GetDescription(Data)
-		self.__GetOriginalLanguage(Soup)
-		self.__GetStatus(Data)
-		for Genre in Data["tags"]["genres"]: self._Title.add_genre(Genre["title"])
-		self.__GetTagsAngAgeLimit(Data)
-		self.__GetBranch()
+		with self.__Profiler.stage("parse"):
+			self._Title.set_id(int(self._Title.slug.split("-")[0]))
+			self._Title.set_content_language("rus")
+			self.__OpenResponsesCache()
+
+			Response = self.__Request(f"https://ranobehub.org/api/ranobe/{self._Title.id}")
+			if not Response.ok: self._Portals.request_error(Response, "Unable request title data.")
+			with self.__Profiler.stage("metadata"): self.__SetMetadata(ExtractMetadata(Response.json["data"]))
+			with self.__Profiler.stage("branch"): self.__GetBranch()
+			self.__OpenChaptersStore()
+			self.__OpenCheckpoint()
+			self.__OpenContentHashes()
 
 	def postprocessor(self):
 		"""Вносит изменения в тайтл непосредственно перед сохранением."""
 
-		EmptyChaptersRemoved = 0
+		self.__Prefetcher.close()
+		if self.__ReusedChapters: self._Portals.info(f"Chapters reused from store: {self.__ReusedChapters}.")
+
+		# Учтённые записи журнала удаляются, чтобы следующий парсинг без нового сбора обновлений был полным.
+		if self.__UpdatedChapters:
+			Journal = UpdatesJournal(self._Temper.parser_temp)
+			Journal.discard(self._Title.slug, max(self.__UpdatedChapters.values()))
+			Journal.close()
+			self.__UpdatedChapters = None
+
+		if self.__ResumedChapters: self._Portals.info(f"Chapters resumed from checkpoint: {self.__ResumedChapters}.")
 
-		for CurrentBranch in self._Title.branches:
-			for CurrentChapter in CurrentBranch.chapters:
-				if not CurrentChapter.paragraphs:
-					Slug = CurrentChapter.slug
-					FilledChapter = self.__FindFilledChapter(CurrentBranch.chapters, Slug)
+		if self.__Checkpoint:
+			self.__Checkpoint.clear()
+			self.__Checkpoint = None
+
+		if self.__Hashes:
+			self.__Hashes.save()
+			self._Portals.info(f"Chapters changed: {len(self.__Hashes.changed)}.")
+
+		if self.__Cache:
+			Statistics = self.__Cache.statistics
+			self._Portals.info(f"HTTP cache: {Statistics.hits} hits, {Statistics.revalidations} revalidations, {Statistics.misses} misses, {Statistics.bytes_saved} bytes saved.")
+			self.__Cache.close()
+			self.__Cache = None
+
+		RateStatistics = self.__RateController.statistics
+		self._Portals.info(f"Requests rate: {RateStatistics.effective_rate:.2f}/s effective, {RateStatistics.current_rate:.2f}/s current, {RateStatistics.backoffs} backoffs.")
+
+		EmptyChaptersRemoved = 0
 
-					if FilledChapter:
+		with self.__Profiler.stage("postprocessor"):
+			for CurrentBranch in self._Title.branches:
+				for CurrentChapter in tuple(CurrentBranch.chapters):
+					if not CurrentChapter.paragraphs and self.__FindFilledChapter(CurrentChapter):
 						CurrentBranch.remove_chapter(CurrentChapter.id)
 						EmptyChaptersRemoved += 1
 
-		if EmptyChaptersRemoved: self._Portals.info(f"Redirecting chapters removed: {EmptyChaptersRemoved}.")
\ No newline at end of file
+		if EmptyChaptersRemoved: self._Portals.info(f"Redirecting chapters removed: {EmptyChaptersRemoved}.")
+		MetricsPath = self._Settings.custom.get("instrumentation_path") or os.path.join(self._Temper.parser_temp, "metrics.jsonl")
+		self.__Profiler.flush(MetricsPath, kind = "title", slug = self._Title.slug, id = self._Title.id)
\ No newline at end of file
@@ -0,0 +1,104 @@
+from dataclasses import dataclass, replace
+from statistics import median
+from time import time
+from typing import Iterable
+
+import math
+
+#==========================================================================================#
+# >>>>> ДАННЫЕ ОБНОВЛЕНИЯ <<<<< #
+#==========================================================================================#
+
+@dataclass(frozen = True)
+class UpdateNote:
+	"""Данные планирования обновлённого тайтла."""
+
+	slug: str
+	id: int
+	updated_at: int
+	new_chapters: int
+	chapters: int | None = None
+
+	def merge(self, other: "UpdateNote") -> "UpdateNote":
+		"""
+		Объединяет данные об обновлениях одного тайтла, полученные из разных записей ленты.
+
+		:param other: Данные другой записи того же тайтла.
+		:type other: UpdateNote
+		:return: Объединённые данные.
+		:rtype: UpdateNote
+		"""
+
+		return replace(
+			self,
+			updated_at = max(self.updated_at, other.updated_at),
+			new_chapters = self.new_chapters + other.new_chapters,
+			chapters = self.chapters if self.chapters is not None else other.chapters
+		)
+
+#==========================================================================================#
+# >>>>> ПЛАНИРОВАНИЕ <<<<< #
+#==========================================================================================#
+
+# Вес уже сохранённой главы в оценке работы: дополнение тайтла запрашивает оглавление и перепроверяет кэшированные главы, но загружает только новые.
+_StoredChapterWeight = 0.02
+
+def GetPriority(note: UpdateNote, now: float, aging: float = 1.0, chapters: int = 0) -> float:
+	"""
+	Вычисляет приоритет обновления: ожидание повышает его, а объём работы снижает логарифмически.
+
+	:param note: Данные обновления.
+	:type note: UpdateNote
+	:param now: Текущее время (UNIX timestamp). Приоритеты, вычисленные относительно одного момента, сравнимы между собой.
+	:type now: float
+	:param aging: Прирост приоритета за час ожидания.
+	:type aging: float
+	:param chapters: Оценка количества глав, используемая при неизвестном размере тайтла.
+	:type chapters: int
+	:return: Приоритет. Чем больше значение, тем раньше следует обработать тайтл.
+	:rtype: float
+	"""
+
+	Chapters = note.chapters if note.chapters is not None else chapters
+	Work = max(note.new_chapters, 1) + Chapters * _StoredChapterWeight
+	Waiting = (now - note.updated_at) / 3600
+
+	return Waiting * aging - math.log2(1 + Work)
+
+def PrioritizeUpdates(notes: Iterable[UpdateNote], now: float | None = None, aging: float = 1.0) -> list[UpdateNote]:
+	"""
+	Упорядочивает обновления: сначала короткие, а ожидающие дольше постепенно поднимаются в очереди, чтобы крупные тайтлы не откладывались бесконечно.
+
+	:param notes: Данные обновлений.
+	:type notes: Iterable[UpdateNote]
+	:param now: Текущее время (UNIX timestamp). По умолчанию используется системное.
+	:type now: float | None
+	:param aging: Прирост приоритета за час ожидания.
+	:type aging: float
+	:return: Данные обновлений в порядке обработки.
+	:rtype: list[UpdateNote]
+	"""
+
+	return [Note for _, Note in ScoreUpdates(notes, now, aging)]
+
+def ScoreUpdates(notes: Iterable[UpdateNote], now: float | None = None, aging: float = 1.0) -> list[tuple[float, UpdateNote]]:
+	"""
+	Вычисляет приоритеты обновлений. Размер тайтлов с неизвестным количеством глав оценивается медианой известных.
+
+	:param notes: Данные обновлений.
+	:type notes: Iterable[UpdateNote]
+	:param now: Текущее время (UNIX timestamp). По умолчанию используется системное.
+	:type now: float | None
+	:param aging: Прирост приоритета за час ожидания.
+	:type aging: float
+	:return: Пары из приоритета и данных обновления в порядке убывания приоритета.
+	:rtype: list[tuple[float, UpdateNote]]
+	"""
+
+	Notes = list(notes)
+	Now = time() if now is None else now
+	Sizes = [Note.chapters for Note in Notes if Note.chapters is not None]
+	Chapters = int(median(Sizes)) if Sizes else 0
+	Scores = [(GetPriority(Note, Now, aging, Chapters), Note) for Note in Notes]
+
+	return sorted(Scores, key = lambda Score: Score[0], reverse = True)
@@ -0,0 +1,585 @@
+from dataclasses import dataclass
+from threading import Lock
+from typing import Iterable
+from hashlib import sha256
+from time import time
+
+import sqlite3
+import json
+import os
+
+#==========================================================================================#
+# >>>>> ЖУРНАЛ ОБНОВЛЕНИЙ <<<<< #
+#==========================================================================================#
+
+class UpdatesJournal:
+	"""
+	Журнал обновлённых глав, полученных из ленты обновлений источника.
+
+	Записи тайтла удаляются после его обработки парсером, поэтому сохранённые главы используются повторно только при парсинге, следующем за сбором обновлений.
+	"""
+
+	def __init__(self, directory: str):
+		"""
+		Журнал обновлённых глав, полученных из ленты обновлений источника.
+
+		:param directory: Каталог хранения журнала.
+		:type directory: str
+		"""
+
+		os.makedirs(directory, exist_ok = True)
+		self.__Connection = sqlite3.connect(os.path.join(directory, "updates.sqlite"), timeout = 30)
+		self.__Connection.execute("CREATE TABLE IF NOT EXISTS updates (slug TEXT, chapter TEXT, updated_at INTEGER, PRIMARY KEY (slug, chapter))")
+		self.__Connection.execute("CREATE INDEX IF NOT EXISTS updates_updated_at ON updates (updated_at)")
+
+	def add(self, slug: str, chapter: str, timestamp: int):
+		"""
+		Добавляет запись об обновлении главы.
+
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:param chapter: ID или алиас главы.
+		:type chapter: str
+		:param timestamp: Время обновления в формате UNIX.
+		:type timestamp: int
+		"""
+
+		self.__Connection.execute(
+			"INSERT INTO updates VALUES (?, ?, ?) ON CONFLICT (slug, chapter) DO UPDATE SET updated_at = MAX(updated_at, excluded.updated_at)",
+			(slug, chapter, int(timestamp))
+		)
+
+	def close(self):
+		"""Закрывает журнал."""
+
+		self.__Connection.close()
+
+	def discard(self, slug: str, timestamp: int):
+		"""
+		Удаляет записи тайтла, учтённые при его обработке. Более новые записи сохраняются.
+
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:param timestamp: Время в формате UNIX, записи не новее которого удаляются.
+		:type timestamp: int
+		"""
+
+		self.__Connection.execute("DELETE FROM updates WHERE slug = ? AND updated_at <= ?", (slug, timestamp))
+		self.__Connection.commit()
+
+	def get(self, slug: str) -> dict[str, int] | None:
+		"""
+		Возвращает словарь обновлённых глав тайтла.
+
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:return: Словарь, в котором ключ – ID или алиас главы, а значение – время обновления, либо `None` при отсутствии тайтла в журнале.
+		:rtype: dict[str, int] | None
+		"""
+
+		Rows = self.__Connection.execute("SELECT chapter, updated_at FROM updates WHERE slug = ?", (slug,)).fetchall()
+
+		return dict(Rows) if Rows else None
+
+	def prune(self, timestamp: int):
+		"""
+		Удаляет записи об обновлениях, сделанных до указанного момента. Тайтлы без записей при следующем парсинге обрабатываются полностью.
+
+		:param timestamp: Время в формате UNIX.
+		:type timestamp: int
+		"""
+
+		self.__Connection.execute("DELETE FROM updates WHERE updated_at < ?", (timestamp,))
+
+	def save(self):
+		"""Сохраняет изменения."""
+
+		self.__Connection.commit()
+
+#==========================================================================================#
+# >>>>> ХРАНИЛИЩЕ ГЛАВ <<<<< #
+#==========================================================================================#
+
+class ChaptersStore:
+	"""Хранилище контейнеров контента ранее загруженных глав тайтла."""
+
+	@property
+	def timestamps(self) -> dict[int, float]:
+		"""Словарь, в котором ключ – ID главы, а значение – время её сохранения в формате UNIX."""
+
+		return self.__Timestamps
+
+	def __init__(self, directory: str, title_id: int):
+		"""
+		Хранилище контейнеров контента ранее загруженных глав тайтла.
+
+		:param directory: Каталог хранилищ.
+		:type directory: str
+		:param title_id: ID тайтла.
+		:type title_id: int
+		"""
+
+		os.makedirs(directory, exist_ok = True)
+		self.__Lock = Lock()
+		self.__Connection = sqlite3.connect(os.path.join(directory, f"{title_id}.sqlite"), check_same_thread = False)
+		self.__Connection.execute("CREATE TABLE IF NOT EXISTS chapters (id INTEGER PRIMARY KEY, stored_at REAL, html TEXT)")
+		self.__Timestamps = dict(self.__Connection.execute("SELECT id, stored_at FROM chapters").fetchall())
+
+	def close(self):
+		"""Закрывает хранилище."""
+
+		with self.__Lock: self.__Connection.close()
+
+	def get(self, chapter_id: int) -> str | None:
+		"""
+		Возвращает код HTML контейнера контента главы.
+
+		:param chapter_id: ID главы.
+		:type chapter_id: int
+		:return: Код HTML или `None` при отсутствии главы в хранилище.
+		:rtype: str | None
+		"""
+
+		with self.__Lock: Row = self.__Connection.execute("SELECT html FROM chapters WHERE id = ?", (chapter_id,)).fetchone()
+
+		return Row[0] if Row else None
+
+	def put(self, chapter_id: int, html: str):
+		"""
+		Сохраняет код HTML контейнера контента главы.
+
+		:param chapter_id: ID главы.
+		:type chapter_id: int
+		:param html: Код HTML.
+		:type html: str
+		"""
+
+		StoredAt = time()
+
+		with self.__Lock:
+			self.__Connection.execute("INSERT OR REPLACE INTO chapters VALUES (?, ?, ?)", (chapter_id, StoredAt, html))
+			self.__Connection.commit()
+
+		self.__Timestamps[chapter_id] = StoredAt
+
+#==========================================================================================#
+# >>>>> КОНТРОЛЬНЫЕ ТОЧКИ ДОПОЛНЕНИЯ <<<<< #
+#==========================================================================================#
+
+class AmendCheckpoint:
+	"""Контрольная точка дополнения глав тайтла, позволяющая продолжить прерванный запуск."""
+
+	@property
+	def chapters(self) -> dict[int, tuple[str, float]]:
+		"""Словарь, в котором ключ – ID завершённой главы, а значение – её алиас и время сохранения в формате UNIX."""
+
+		return self.__Chapters
+
+	def __init__(self, directory: str, title_id: int):
+		"""
+		Контрольная точка дополнения глав тайтла, позволяющая продолжить прерванный запуск.
+
+		:param directory: Каталог контрольных точек.
+		:type directory: str
+		:param title_id: ID тайтла.
+		:type title_id: int
+		"""
+
+		os.makedirs(directory, exist_ok = True)
+		self.__Path = os.path.join(directory, f"{title_id}.sqlite")
+		self.__Lock = Lock()
+		self.__Connection = sqlite3.connect(self.__Path, check_same_thread = False)
+		self.__Connection.execute("CREATE TABLE IF NOT EXISTS chapters (id INTEGER PRIMARY KEY, slug TEXT, stored_at REAL, content TEXT)")
+		self.__Chapters = {Row[0]: (Row[1], Row[2]) for Row in self.__Connection.execute("SELECT id, slug, stored_at FROM chapters")}
+
+	def clear(self):
+		"""Удаляет контрольную точку после успешного завершения дополнения тайтла."""
+
+		self.close()
+		if os.path.exists(self.__Path): os.remove(self.__Path)
+		self.__Chapters = dict()
+
+	def close(self):
+		"""Закрывает контрольную точку."""
+
+		with self.__Lock: self.__Connection.close()
+
+	def get(self, chapter_id: int) -> str | None:
+		"""
+		Возвращает сериализованное содержимое завершённой главы.
+
+		:param chapter_id: ID главы.
+		:type chapter_id: int
+		:return: Содержимое главы или `None` при её отсутствии в контрольной точке.
+		:rtype: str | None
+		"""
+
+		with self.__Lock: Row = self.__Connection.execute("SELECT content FROM chapters WHERE id = ?", (chapter_id,)).fetchone()
+
+		return Row[0] if Row else None
+
+	def put(self, chapter_id: int, slug: str, content: str):
+		"""
+		Отмечает главу завершённой и сохраняет её сериализованное содержимое.
+
+		:param chapter_id: ID главы.
+		:type chapter_id: int
+		:param slug: Алиас главы.
+		:type slug: str
+		:param content: Сериализованное содержимое главы.
+		:type content: str
+		"""
+
+		StoredAt = time()
+
+		with self.__Lock:
+			self.__Connection.execute("INSERT OR REPLACE INTO chapters VALUES (?, ?, ?, ?)", (chapter_id, slug, StoredAt, content))
+			self.__Connection.commit()
+
+		self.__Chapters[chapter_id] = (slug, StoredAt)
+
+#==========================================================================================#
+# >>>>> ХЭШИ КОНТЕНТА ГЛАВ <<<<< #
+#==========================================================================================#
+
+class ContentHashes:
+	"""Хэши контента глав тайтла для определения изменившихся с прошлого запуска глав."""
+
+	@property
+	def changed(self) -> tuple[int]:
+		"""Последовательность ID глав, контент которых изменился или появился в текущем запуске."""
+
+		return tuple(self.__Changed)
+
+	def __init__(self, directory: str, title_id: int):
+		"""
+		Хэши контента глав тайтла для определения изменившихся с прошлого запуска глав.
+
+		:param directory: Каталог хранения хэшей.
+		:type directory: str
+		:param title_id: ID тайтла.
+		:type title_id: int
+		"""
+
+		self.__Path = os.path.join(directory, f"{title_id}.json")
+		self.__Hashes: dict[str, str] = dict()
+		self.__Changed: list[int] = list()
+
+		if os.path.exists(self.__Path):
+			with open(self.__Path, encoding = "utf-8") as FileReader: self.__Hashes = json.load(FileReader)["hashes"]
+
+	def save(self):
+		"""Сохраняет хэши вместе со списком изменившихся глав для последующей синхронизации."""
+
+		os.makedirs(os.path.dirname(self.__Path), exist_ok = True)
+		with open(self.__Path, "w", encoding = "utf-8") as FileWriter: json.dump({"hashes": self.__Hashes, "changed": self.__Changed}, FileWriter)
+
+	def update(self, chapter_id: int, content: str) -> bool:
+		"""
+		Обновляет хэш контента главы.
+
+		:param chapter_id: ID главы.
+		:type chapter_id: int
+		:param content: Сериализованный нормализованный контент главы.
+		:type content: str
+		:return: Состояние: изменился ли контент главы.
+		:rtype: bool
+		"""
+
+		Hash = sha256(content.encode()).hexdigest()
+		if self.__Hashes.get(str(chapter_id)) == Hash: return False
+		self.__Hashes[str(chapter_id)] = Hash
+		self.__Changed.append(chapter_id)
+
+		return True
+
+#==========================================================================================#
+# >>>>> ИНДЕКС КАТАЛОГА <<<<< #
+#==========================================================================================#
+
+class CatalogIndex:
+	"""Локальный индекс тайтлов источника с отметками последних обновлений."""
+
+	@property
+	def watermark(self) -> int | None:
+		"""Время самого нового обработанного обновления ленты в формате UNIX."""
+
+		Row = self.__Connection.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+
+		return int(Row[0]) if Row else None
+
+	def __init__(self, directory: str):
+		"""
+		Локальный индекс тайтлов источника с отметками последних обновлений.
+
+		:param directory: Каталог хранения индекса.
+		:type directory: str
+		"""
+
+		os.makedirs(directory, exist_ok = True)
+		self.__Connection = sqlite3.connect(os.path.join(directory, "catalog.sqlite"))
+		self.__Connection.execute("CREATE TABLE IF NOT EXISTS titles (slug TEXT PRIMARY KEY, id INTEGER, updated_at INTEGER)")
+		self.__Connection.execute("CREATE INDEX IF NOT EXISTS titles_updated_at ON titles (updated_at)")
+		self.__Connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+		Columns = {Row[1] for Row in self.__Connection.execute("PRAGMA table_info(titles)")}
+		if "chapters" not in Columns: self.__Connection.execute("ALTER TABLE titles ADD COLUMN chapters INTEGER")
+
+	def changed_since(self, timestamp: int) -> tuple[str]:
+		"""
+		Возвращает алиасы тайтлов, обновлённых после указанного момента, без обращения к источнику.
+
+		:param timestamp: Время в формате UNIX.
+		:type timestamp: int
+		:return: Алиасы тайтлов в порядке от новых к старым.
+		:rtype: tuple[str]
+		"""
+
+		Rows = self.__Connection.execute("SELECT slug FROM titles WHERE updated_at > ? ORDER BY updated_at DESC", (timestamp,))
+
+		return tuple(Row[0] for Row in Rows)
+
+	def close(self):
+		"""Закрывает индекс."""
+
+		self.__Connection.close()
+
+	def commit(self):
+		"""Сохраняет изменения."""
+
+		self.__Connection.commit()
+
+	def set_chapters(self, slug: str, title_id: int, chapters: int):
+		"""
+		Задаёт количество глав тайтла, используемое для планирования обработки.
+
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:param title_id: ID тайтла.
+		:type title_id: int
+		:param chapters: Количество глав.
+		:type chapters: int
+		"""
+
+		self.__Connection.execute(
+			"INSERT INTO titles (slug, id, chapters) VALUES (?, ?, ?) ON CONFLICT (slug) DO UPDATE SET id = excluded.id, chapters = excluded.chapters",
+			(slug, title_id, chapters)
+		)
+		self.__Connection.commit()
+
+	def set_watermark(self, timestamp: int):
+		"""
+		Задаёт время самого нового обработанного обновления ленты.
+
+		:param timestamp: Время в формате UNIX.
+		:type timestamp: int
+		"""
+
+		self.__Connection.execute("INSERT OR REPLACE INTO meta VALUES ('watermark', ?)", (str(int(timestamp)),))
+		self.__Connection.commit()
+
+	def sizes(self, slugs: Iterable[str]) -> dict[str, int]:
+		"""
+		Возвращает известные количества глав тайтлов.
+
+		:param slugs: Алиасы тайтлов.
+		:type slugs: Iterable[str]
+		:return: Словарь, в котором ключ – алиас тайтла, а значение – количество глав. Тайтлы с неизвестным количеством глав отсутствуют.
+		:rtype: dict[str, int]
+		"""
+
+		Sizes = dict()
+
+		for Slug in slugs:
+			Row = self.__Connection.execute("SELECT chapters FROM titles WHERE slug = ?", (Slug,)).fetchone()
+			if Row and Row[0] is not None: Sizes[Slug] = Row[0]
+
+		return Sizes
+
+	def update(self, slug: str, title_id: int, timestamp: int | None = None):
+		"""
+		Добавляет тайтл в индекс или обновляет его отметку. Более старая отметка не заменяет новую.
+
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:param title_id: ID тайтла.
+		:type title_id: int
+		:param timestamp: Время последнего обновления в формате UNIX.
+		:type timestamp: int | None
+		"""
+
+		self.__Connection.execute(
+			"INSERT INTO titles (slug, id, updated_at) VALUES (?, ?, ?) ON CONFLICT (slug) DO UPDATE SET id = excluded.id, updated_at = MAX(COALESCE(updated_at, 0), COALESCE(excluded.updated_at, 0))",
+			(slug, title_id, timestamp)
+		)
+
+#==========================================================================================#
+# >>>>> ОЧЕРЕДЬ ТАЙТЛОВ <<<<< #
+#==========================================================================================#
+
+@dataclass(frozen = True)
+class TitleLease:
+	"""Аренда тайтла из очереди."""
+
+	slug: str
+	id: int
+	priority: float
+	attempts: int
+
+class TitlesQueue:
+	"""
+	Очередь тайтлов с арендой для распределения обработки между несколькими узлами.
+
+	Арендованный тайтл скрывается от остальных узлов до истечения аренды, после чего снова становится доступен. Повторно поставленный в очередь тайтл не дублируется: ожидающая запись получает наибольший приоритет, а обработанная возвращается в ожидание.
+	"""
+
+	@property
+	def counts(self) -> dict[str, int]:
+		"""Словарь, в котором ключ – состояние записей (_pending_, _leased_, _done_, _failed_), а значение – их количество."""
+
+		with self.__Lock: Rows = self.__Connection.execute("SELECT state, COUNT(*) FROM queue GROUP BY state").fetchall()
+
+		return dict(Rows)
+
+	def __init__(self, path: str, max_attempts: int = 3):
+		"""
+		Очередь тайтлов с арендой для распределения обработки между несколькими узлами.
+
+		:param path: Путь к файлу базы данных очереди, доступному всем узлам.
+		:type path: str
+		:param max_attempts: Количество аренд тайтла, после которого он считается необработанным.
+		:type max_attempts: int
+		"""
+
+		os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+		self.__MaxAttempts = max_attempts
+		self.__Lock = Lock()
+
+		self.__Connection = sqlite3.connect(path, timeout = 30, isolation_level = None, check_same_thread = False)
+		self.__Connection.execute(
+			"CREATE TABLE IF NOT EXISTS queue (slug TEXT PRIMARY KEY, id INTEGER, priority REAL, state TEXT, owner TEXT, lease_until REAL, attempts INTEGER, requeued INTEGER, enqueued_at REAL)"
+		)
+		self.__Connection.execute("CREATE INDEX IF NOT EXISTS queue_order ON queue (state, priority DESC, enqueued_at)")
+
+	def __Finish(self, slug: str, owner: str, state: str):
+		"""
+		Завершает аренду тайтла.
+
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:param owner: Идентификатор узла-арендатора.
+		:type owner: str
+		:param state: Состояние записи после завершения аренды. Тайтл, повторно поставленный в очередь во время аренды, возвращается в ожидание.
+		:type state: str
+		"""
+
+		with self.__Lock:
+			self.__Connection.execute(
+				"UPDATE queue SET state = CASE WHEN requeued THEN 'pending' ELSE ? END, attempts = CASE WHEN requeued THEN 0 ELSE attempts END, requeued = 0, owner = NULL, lease_until = NULL WHERE slug = ? AND owner = ? AND state = 'leased'",
+				(state, slug, owner)
+			)
+
+	def ack(self, slug: str, owner: str):
+		"""
+		Подтверждает обработку тайтла.
+
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:param owner: Идентификатор узла-арендатора.
+		:type owner: str
+		"""
+
+		self.__Finish(slug, owner, "done")
+
+	def close(self):
+		"""Закрывает очередь."""
+
+		with self.__Lock: self.__Connection.close()
+
+	def enqueue(self, slug: str, title_id: int, priority: float = 0.0):
+		"""
+		Ставит тайтл в очередь.
+
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:param title_id: ID тайтла.
+		:type title_id: int
+		:param priority: Приоритет. Тайтлы с большим приоритетом выдаются раньше.
+		:type priority: float
+		"""
+
+		with self.__Lock:
+			self.__Connection.execute(
+				"INSERT INTO queue VALUES (?, ?, ?, 'pending', NULL, NULL, 0, 0, ?) ON CONFLICT (slug) DO UPDATE SET "
+				"priority = CASE WHEN state = 'pending' THEN MAX(priority, excluded.priority) ELSE excluded.priority END, "
+				"requeued = state = 'leased', "
+				"attempts = CASE WHEN state = 'leased' THEN attempts ELSE 0 END, "
+				"enqueued_at = CASE WHEN state = 'pending' THEN enqueued_at ELSE excluded.enqueued_at END, "
+				"state = CASE WHEN state = 'leased' THEN state ELSE 'pending' END",
+				(slug, title_id, priority, time())
+			)
+
+	def extend(self, slug: str, owner: str, timeout: float) -> bool:
+		"""
+		Продлевает аренду тайтла.
+
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:param owner: Идентификатор узла-арендатора.
+		:type owner: str
+		:param timeout: Новая длительность аренды от текущего момента (в секундах).
+		:type timeout: float
+		:return: Состояние: удалось ли продлить аренду. Истёкшая аренда могла перейти к другому узлу.
+		:rtype: bool
+		"""
+
+		with self.__Lock:
+			Cursor = self.__Connection.execute("UPDATE queue SET lease_until = ? WHERE slug = ? AND owner = ? AND state = 'leased'", (time() + timeout, slug, owner))
+
+		return bool(Cursor.rowcount)
+
+	def lease(self, owner: str, timeout: float) -> TitleLease | None:
+		"""
+		Арендует тайтл с наибольшим приоритетом. Тайтлы с истёкшей арендой выдаются повторно.
+
+		:param owner: Идентификатор узла-арендатора.
+		:type owner: str
+		:param timeout: Длительность аренды (в секундах).
+		:type timeout: float
+		:return: Аренда или `None`, если доступных тайтлов нет.
+		:rtype: TitleLease | None
+		"""
+
+		Now = time()
+
+		with self.__Lock:
+			self.__Connection.execute("BEGIN IMMEDIATE")
+
+			try:
+				self.__Connection.execute("UPDATE queue SET state = 'failed', owner = NULL WHERE state = 'leased' AND lease_until < ? AND attempts >= ?", (Now, self.__MaxAttempts))
+				Row = self.__Connection.execute(
+					"SELECT slug, id, priority, attempts FROM queue WHERE state = 'pending' OR state = 'leased' AND lease_until < ? ORDER BY priority DESC, enqueued_at LIMIT 1",
+					(Now,)
+				).fetchone()
+				if Row: self.__Connection.execute("UPDATE queue SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1 WHERE slug = ?", (owner, Now + timeout, Row[0]))
+				self.__Connection.execute("COMMIT")
+
+			except Exception:
+				self.__Connection.execute("ROLLBACK")
+				raise
+
+		return TitleLease(Row[0], Row[1], Row[2], Row[3] + 1) if Row else None
+
+	def release(self, slug: str, owner: str):
+		"""
+		Возвращает тайтл в очередь после ошибки обработки. Тайтл, исчерпавший попытки, помечается необработанным.
+
+		:param slug: Алиас тайтла.
+		:type slug: str
+		:param owner: Идентификатор узла-арендатора.
+		:type owner: str
+		"""
+
+		with self.__Lock:
+			Row = self.__Connection.execute("SELECT attempts FROM queue WHERE slug = ?", (slug,)).fetchone()
+
+		self.__Finish(slug, owner, "failed" if Row and Row[0] >= self.__MaxAttempts else "pending")
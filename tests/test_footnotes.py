@@ -0,0 +1,113 @@
+"""
+Регрессионные проверки обработки заметок на главе с плотными сносками.
+
+Запуск из корня Melon: `python -m unittest Parsers.ranobehub.tests.test_footnotes`.
+"""
+
+try:
+	from Parsers.ranobehub.extractor import ElementData, ExtractChapter, FindContainer
+	from Parsers.ranobehub.ranobe import Parser
+
+except ImportError as ExceptionData:
+	import unittest
+	raise unittest.SkipTest(f"Melon is not available: {ExceptionData}.")
+
+from bs4 import Tag
+
+import unittest
+
+ChapterID = 100000001
+
+def BuildDensePage() -> str:
+	"""Страница главы, в каждом абзаце которой несколько ссылок на заметки, в том числе повторные и ведущие на отсутствующие заметки."""
+
+	Paragraphs = list()
+
+	for Index in range(150):
+		Anchors = "".join(f"слово<sup><a href=\"#note-{(Index * 6 + Offset) % 240}\">{Offset}</a></sup> " for Offset in range(6))
+		Repeated = f"<b>повтор<a href=\"#note-{Index % 240}\">*</a></b>"
+		Missing = f"<sup><a href=\"#missing-{Index}\">?</a></sup>" if Index % 10 == 0 else ""
+		Paragraphs.append(f"<p>Абзац {Index}: {Anchors}{Repeated}{Missing}<br></p>")
+		if Index % 15 == 7: Paragraphs.append(f"<blockquote><p>Цитата<a href=\"#note-{Index}\">{Index}</a></p><p>Строка <i>два</i><a href=\"#note-{Index + 1}\">+</a></p></blockquote>")
+
+	Lists = list()
+
+	for Part in range(3):
+		Notes = "".join(f"<li id=\"note-{Index}\"><a href=\"#ref-{Index}\">^</a> Пояснение <i>{Index}</i> с <b>оформлением</b>.</li>" for Index in range(Part * 80, (Part + 1) * 80))
+		Lists.append(f"<ol>{Notes}</ol>")
+
+	Interface = "<div class=\"ui\"><ol><li id=\"note-0\">Элемент интерфейса</li></ol></div>"
+
+	return f"<html><body><div data-container=\"{ChapterID}\">{Interface}{''.join(Paragraphs)}{''.join(Lists)}</div></body></html>"
+
+def GetFootnotesByLists(container: Tag) -> dict[str, str]:
+	"""Прежняя реализация индексации заметок: отдельный обход каждого списка."""
+
+	Footnotes = dict()
+
+	for Reference in container.find_all("ol"):
+		if Reference.find_parent("div") is not container: continue
+
+		for Item in Reference.find_all("li"):
+			ReferenceID = Item.attrs.get("id")
+			if not ReferenceID: continue
+			Backlink = Item.find("a")
+			Excluded = {id(String) for String in Backlink.strings} if Backlink else set()
+			Footnotes[ReferenceID] = "".join(String for String in Item.strings if id(String) not in Excluded)
+
+	return Footnotes
+
+def FindFootnotesByReplacement(data: ElementData, footnotes_dict: dict) -> tuple[str, list]:
+	"""Прежняя реализация замены ссылок: поиск каждой ссылки во всём тексте элемента."""
+
+	Text = data.text
+	Footnotes = list()
+
+	for Segment in data.segments:
+		if type(Segment) == str or Segment.id not in footnotes_dict: continue
+		FootnoteObject = footnotes_dict[Segment.id]
+		FootnoteObject.set_placeholder(Segment.placeholder)
+		Text = FootnoteObject.replace_in_text(Text, Segment.html)
+		Footnotes.append(FootnoteObject)
+
+	return Text, Footnotes
+
+def IterateElements(elements: tuple[ElementData]):
+	"""Перебирает элементы главы вместе с вложенными."""
+
+	for Data in elements:
+		yield Data
+		yield from IterateElements(Data.children)
+
+class DenseFootnotesTest(unittest.TestCase):
+	"""Сравнивает прежнюю и текущую обработку заметок на главе с плотными сносками."""
+
+	@classmethod
+	def setUpClass(cls):
+		# Методы обработки заметок используют только системные объекты, поэтому парсер создаётся без инициализации Melon.
+		cls.Parser = Parser.__new__(Parser)
+		cls.Parser._SystemObjects = None
+		Soup, cls.Container = FindContainer(BuildDensePage(), ChapterID)
+		cls.Content = ExtractChapter(Soup, cls.Container)
+
+	def test_footnotes_index(self):
+		self.assertEqual(len(self.Content.footnotes), 240)
+		self.assertEqual(self.Content.footnotes, GetFootnotesByLists(self.Container))
+
+	def test_elements_text_and_footnotes(self):
+		NewFootnotes = self.Parser._Parser__GetFootnotes(self.Content.footnotes)
+		OldFootnotes = self.Parser._Parser__GetFootnotes(GetFootnotesByLists(self.Container))
+		NewIDs = {id(FootnoteObject): ReferenceID for ReferenceID, FootnoteObject in NewFootnotes.items()}
+		OldIDs = {id(FootnoteObject): ReferenceID for ReferenceID, FootnoteObject in OldFootnotes.items()}
+		Anchors = 0
+
+		for Data in IterateElements(self.Content.elements):
+			Result = self.Parser._Parser__FindFootnotesByAnchors(Data, NewFootnotes)
+			Text, Footnotes = FindFootnotesByReplacement(Data, OldFootnotes)
+			self.assertEqual(Result.text, Text)
+			self.assertEqual([NewIDs[id(FootnoteObject)] for FootnoteObject in Result.footnotes], [OldIDs[id(FootnoteObject)] for FootnoteObject in Footnotes])
+			Anchors += len(Result.footnotes)
+
+		self.assertGreater(Anchors, 1000)
+
+if __name__ == "__main__": unittest.main()